@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Mikro-Benchmark für die ConstructionKit-Klassifikation.
+
+Vergleicht die frühere Klassifikation (re.findall mit drei langen Mustern pro
+Branch) mit ckit_version.classify und ckit_version.parse_reference auf
+synthetischen Recipe-Zeilen.
+
+    python bench_ckit_version.py --lines 500000 --unique 2000
+"""
+import argparse
+import random
+import re
+import time
+
+import ckit_version
+
+FORMS = [
+    "constructionkit/[>={v}]@spx00/release",
+    "constructionkit/{v}@spx00/release",
+    "constructionkit/[{v}]@spx00/release",
+    "constructionkit/[>{v} <{w}]@spx00/release",
+    "constructionkit/[{v} || >{v} <{w}]@spx00/release",
+    "constructionkit/[~{v}]@spx00/release",
+]
+
+
+def legacy_classify(current_version):
+    """Klassifikation wie vor der Einführung von ckit_version (Referenz für den Vergleich)"""
+    if re.findall(r"^.*\[(\d+\.\d+\.\d+|>\d+\.\d+\.\d+\s*<\d+\.\d+\.\d+|\d+\.\d+\.\d+\s*\|\|\s*>\d+\.\d+\.\d+\s*<\d+\.\d+\.\d+)].*$", current_version) or \
+       re.findall(r"^.*/\d+\.\d+\.\d+@.*$", current_version):
+        return "fixed_versions"
+    elif re.findall(r"^.*\[>=\d+\.\d+\.\d+].*$", current_version):
+        return "latest_versions"
+    return "unknown_versions"
+
+
+def synthetic_lines(count, unique, seed=42):
+    """`count` Zeilen aus `unique` verschiedenen Referenzen erzeugen (wie viele Branches mit gleichem Pin)"""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(unique):
+        minor = rng.randint(0, 60)
+        v = f"1.{minor}.{rng.randint(0, 9)}"
+        w = f"{rng.randint(2, 3)}.0.0"
+        pool.append(rng.choice(FORMS).format(v=v, w=w))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(label, func, lines):
+    start = time.perf_counter()
+    result = [func(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms   {len(lines) / elapsed:12,.0f} Zeilen/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=300_000, help="Anzahl synthetischer Recipe-Zeilen")
+    parser.add_argument("--unique", type=int, default=1_000, help="Anzahl verschiedener Referenzen")
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.lines, args.unique)
+    print(f"{args.lines:,} Zeilen, {args.unique:,} verschiedene Referenzen")
+
+    expected = timed("legacy re.findall", legacy_classify, lines)
+    actual = timed("classify", ckit_version.classify, lines)
+    ckit_version.parse_reference.cache_clear()
+    parsed = timed("parse_reference (kalt)", lambda line: ckit_version.parse_reference(line).bucket, lines)
+    timed("parse_reference (warm)", lambda line: ckit_version.parse_reference(line).bucket, lines)
+    timed("parse_reference (ohne Cache)", lambda line: ckit_version.parse_reference.__wrapped__(line).bucket, lines)
+
+    recipes = [f"[requires]\nfoo/1.0@a/b\n{line}\nbar/2.0@a/b\n" for line in lines[:50_000]]
+    timed("find_constructionkit_version", ckit_version.find_constructionkit_version, recipes)
+
+    if expected != actual or expected != parsed:
+        raise SystemExit("Abweichende Klassifikation gegenüber legacy_classify!")
+    print("Klassifikation identisch zur bisherigen Logik.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark für Scan (Option A) und Update (Option C) gegen den lokalen Mock-Server.
+
+Startet mock_github mit einer synthetischen Flotte, richtet den gemeinsamen
+Client von main.py darauf aus und misst scan_repositories und run_update –
+die Kerne von check_constructionkit_versions bzw.
+update_constructionkit_versions, ohne deren interaktive Eingaben. Ausgegeben
+werden Repos/s, Branches/s und Anfragen pro Branch.
+
+    python bench_fleet.py --repos 500 --branches 200 --latency 20 --concurrency 32
+    python bench_fleet.py --url http://127.0.0.1:8765/api/v3 --repos 50   # externer Mock
+    python bench_fleet.py --rate-limit 500 --rate-window 10 --tokens 4      # Token-Pool
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import main
+from mock_github import Fleet, MockGitHub, RECIPE_PATH
+
+
+def run_phase(label, func, branches_of):
+    """Eine Phase messen -> Kennzahlen; `branches_of(Ergebnis)` liefert die Anzahl bearbeiteter Branches"""
+    main.CLIENT.metrics.reset()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result, repos = func()
+    elapsed = time.perf_counter() - start
+    branches = branches_of(result)
+    totals = main.CLIENT.metrics.totals()
+    p95 = max((e["latency_p95"] for e in main.CLIENT.metrics.snapshot()["endpoints"].values()), default=0.0)
+    stats = {
+        "phase": label,
+        "seconds": round(elapsed, 3),
+        "repos": repos,
+        "branches": branches,
+        "repos_per_second": round(repos / elapsed, 2) if elapsed else None,
+        "branches_per_second": round(branches / elapsed, 1) if elapsed else None,
+        "requests": totals["calls"],
+        "requests_per_branch": round(totals["calls"] / branches, 3) if branches else None,
+        "errors": totals["errors"],
+        "retries": totals["retries"],
+        "cache_hits": totals["cache_hits"],
+        "throttled_seconds": round(totals["throttled_seconds"], 2),
+        "latency_p95_ms": round(1000 * p95, 1),
+    }
+    print(f"  {label:<14} {elapsed:8.2f}s  {stats['repos_per_second'] or 0:8.1f} Repos/s  "
+          f"{stats['branches_per_second'] or 0:9.1f} Branches/s  {totals['calls']:8} Anfragen  "
+          f"{stats['requests_per_branch'] or 0:6.2f} Anfr./Branch  {totals['retries']:5} Wdh.")
+    return stats, result
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=50, help="Anzahl Repositories der Flotte")
+    parser.add_argument("--branches", type=int, default=200, help="Release-Branches pro Repository")
+    parser.add_argument("--recipe-padding", type=int, default=0, help="Bytes hinter der ConstructionKit-Zeile")
+    parser.add_argument("--full-fetch", action="store_true", help="Recipes als JSON laden statt zu streamen")
+    parser.add_argument("--url", help="externen Mock verwenden statt einen im Prozess zu starten")
+    parser.add_argument("--latency", type=float, default=10.0, help="mittlere Antwortzeit des Mocks in ms")
+    parser.add_argument("--jitter", type=float, default=5.0, help="Streuung der Antwortzeit in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil injizierter 5xx-Antworten")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Rate-Limit des Mocks pro Fenster")
+    parser.add_argument("--rate-window", type=int, default=3600, help="Länge des Rate-Limit-Fensters in s")
+    parser.add_argument("--tokens", type=int, default=1, help="Anzahl Tokens im Pool (je eigenes Kontingent)")
+    parser.add_argument("--concurrency", type=int, default=main.DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-rate", type=float, default=10_000.0, help="Obergrenze des Clients in Anfragen/s")
+    parser.add_argument("--backoff", type=float, default=0.05, help="Basis-Backoff bei Wiederholungen in s")
+    parser.add_argument("--backend", choices=("rest", "graphql"), default="rest")
+    parser.add_argument("--http-cache", action="store_true", help="ETag-Cache (temporäre Datei) einschalten")
+    parser.add_argument("--rescan", action="store_true", help="zusätzlich einen inkrementellen Zweit-Scan messen")
+    parser.add_argument("--update-repos", type=int, default=10,
+                        help="Anzahl Repos, deren Latest-Branches aktualisiert werden (0 = kein Update)")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON-Datei schreiben")
+    args = parser.parse_args()
+
+    repos = [f"spx01/repo-{i:04d}" for i in range(args.repos)]
+    mock = None
+    if args.url:
+        url = args.url
+    else:
+        fleet = Fleet(args.repos, args.branches, padding=args.recipe_padding)
+        mock = MockGitHub(fleet, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate_limit=args.rate_limit, rate_window=args.rate_window).start()
+        url = mock.url
+
+    main.CLIENT.set_base_url(url)
+    main.CLIENT.set_tokens([f"bench-token-{i}" for i in range(args.tokens)])
+    main.CLIENT.configure_pool(args.concurrency)
+    main.CLIENT.configure_rate(max_rate=args.max_rate, burst=args.concurrency)
+    main.CLIENT.limiter.base_backoff = args.backoff
+    main.STREAM_RECIPES = not args.full_fetch
+    workdir = tempfile.mkdtemp(prefix="bench_fleet_")
+    state_dir = os.path.join(workdir, "scan_state")
+    main.CLIENT.cache = main.HttpCache(os.path.join(workdir, "http_cache.sqlite")) if args.http_cache else None
+
+    print(f"{args.repos} Repos × {args.branches} Release-Branches über {url}, "
+          f"Parallelität {args.concurrency}, Backend {args.backend}, {args.tokens} Token")
+    phases = []
+
+    def scan():
+        sink = main.scan_repositories(repos, RECIPE_PATH, "release/*", args.concurrency, args.backend, state_dir)
+        return sink.output(), len(sink.finished)
+
+    def scanned_branches(output):
+        return sum(len(branches) for info in output.values() for branches in info.values())
+
+    stats, output = run_phase("Scan (kalt)", scan, scanned_branches)
+    phases.append(stats)
+    if args.rescan:
+        stats, output = run_phase("Scan (inkr.)", scan, scanned_branches)
+        phases.append(stats)
+
+    if args.update_repos:
+        selected = dict(list(output.items())[:args.update_repos])
+        results = {"recipe_path": RECIPE_PATH, "output": selected}
+
+        def update():
+            report = main.run_update(results, "1.99.0", args.concurrency, state_dir)
+            return report, len(selected)
+
+        stats, report = run_phase("Update", update, lambda report: len(report["results"]))
+        stats.update(created=report["created"], failed=report["failed"])
+        phases.append(stats)
+        if report["failed"]:
+            print(f"  ⚠️  {report['failed']} Branches fehlgeschlagen")
+
+    if mock:
+        mock.stop()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"repos": args.repos, "branches": args.branches, "concurrency": args.concurrency,
+                       "tokens": args.tokens,
+                       "backend": args.backend, "latency_ms": args.latency, "error_rate": args.error_rate,
+                       "phases": phases}, f, indent=4)
+        print(f"Ergebnisse gespeichert in: {args.json}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
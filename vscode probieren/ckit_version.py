@@ -0,0 +1,188 @@
+"""
+Parser für ConstructionKit-Referenzen aus Conan-Recipes.
+
+Eine Zeile wie `constructionkit/[>=1.43.0]@spx00/release` wird in ein
+unveränderliches, hashbares VersionSpec-Objekt übersetzt. Alle Muster sind
+vorkompiliert; classify kommt mit einem einzigen Suchlauf aus, VersionSpecs
+werden pro Zeileninhalt zwischengespeichert, damit auch sehr große Scans
+nicht an der Klassifikation hängen.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Erste Zeile eines Recipes, die mit "constructionkit/" beginnt
+_REFERENCE_LINE = re.compile(r"^\s*(constructionkit/[^\r\n]*)", re.M)
+
+# Formen, die als feste Version gelten (exakter Pin, [X], [>A <B], [X || >A <B])
+_FIXED = re.compile(
+    r"\[(?P<exact>\d+\.\d+\.\d+)]"
+    r"|\[>(?P<low>\d+\.\d+\.\d+)\s*<(?P<high>\d+\.\d+\.\d+)]"
+    r"|\[(?P<or_exact>\d+\.\d+\.\d+)\s*\|\|\s*>(?P<or_low>\d+\.\d+\.\d+)\s*<(?P<or_high>\d+\.\d+\.\d+)]"
+    r"|/(?P<pin>\d+\.\d+\.\d+)@")
+
+# Feste Formen und Untergrenze (-> folgt immer der neuesten Version) in einer
+# Alternation hinter dem gemeinsamen "[": ein einziger Suchlauf bestimmt die
+# Kategorie, ohne VersionRange-Objekte zu bauen. Gruppennamen wie in _FIXED.
+_BUCKET = re.compile(
+    r"\[(?:(?P<exact>\d+\.\d+\.\d+)]"
+    r"|>(?P<low>\d+\.\d+\.\d+)\s*<(?P<high>\d+\.\d+\.\d+)]"
+    r"|(?P<or_exact>\d+\.\d+\.\d+)\s*\|\|\s*>(?P<or_low>\d+\.\d+\.\d+)\s*<(?P<or_high>\d+\.\d+\.\d+)]"
+    r"|>=(?P<floor>\d+\.\d+\.\d+)])"
+    r"|/(?P<pin>\d+\.\d+\.\d+)@")
+
+# Allgemeine Zerlegung der Referenz und einzelner Bedingungen in Klammern
+_REFERENCE = re.compile(r"^(?P<name>[^/\s]+)/(?P<version>\[[^\]]*]|[^@\s]+)(?:@(?P<user>[^/\s]+)/(?P<channel>\S+))?")
+_CONDITION = re.compile(r"^(?P<op>>=|<=|>|<|=|~|\^)?(?P<version>\d+(?:\.\d+)*)$")
+
+BUCKETS = {
+    "exact": "fixed_versions",
+    "range": "fixed_versions",
+    "or": "fixed_versions",
+    "floor": "latest_versions",
+    "unknown": "unknown_versions",
+}
+
+
+def parse_version(text):
+    """Versionsstring in ein vergleichbares Tupel wandeln ("1.43.0" -> (1, 43, 0))"""
+    return tuple(map(int, text.split(".")))
+
+
+class VersionRange(NamedTuple):
+    """Zulässiger Versionsbereich; None steht für "unbegrenzt" """
+    low: tuple = None
+    low_inclusive: bool = True
+    high: tuple = None
+    high_inclusive: bool = False
+
+    def allows(self, version):
+        if self.low is not None and (version < self.low or (version == self.low and not self.low_inclusive)):
+            return False
+        if self.high is not None and (version > self.high or (version == self.high and not self.high_inclusive)):
+            return False
+        return True
+
+
+class VersionSpec(NamedTuple):
+    """Strukturierte ConstructionKit-Referenz einer Recipe-Zeile"""
+    line: str
+    kind: str                # "exact", "range", "or", "floor" oder "unknown"
+    ranges: tuple = ()       # VersionRange-Alternativen (ODER-verknüpft)
+    user: str = None
+    channel: str = None
+
+    @property
+    def bucket(self):
+        """Kategorie in output.json (fixed_versions / latest_versions / unknown_versions)"""
+        return BUCKETS[self.kind]
+
+    @property
+    def minimum(self):
+        """Kleinste Version, die die Referenz zulässt (None, wenn unbekannt oder unbeschränkt)"""
+        lows = [r.low for r in self.ranges]
+        if not lows or None in lows:
+            return None
+        return min(lows)
+
+    def allows(self, version):
+        """Prüfen, ob eine Version (String oder Tupel) die Referenz erfüllt"""
+        if isinstance(version, str):
+            version = parse_version(version)
+        return any(r.allows(version) for r in self.ranges)
+
+
+def exact(version):
+    """Bereich, der genau eine Version zulässt"""
+    v = parse_version(version)
+    return VersionRange(v, True, v, True)
+
+
+def _parse_ranges(expression):
+    """Allgemeine Conan-Bereichssyntax zerlegen ("1.2.3 || >1.5 <2" -> VersionRanges)"""
+    ranges = []
+    for alternative in expression.split("||"):
+        low, low_inclusive, high, high_inclusive = None, True, None, False
+        conditions = alternative.split()
+        if not conditions:
+            return ()
+        for condition in conditions:
+            match = _CONDITION.match(condition)
+            if not match:
+                return ()
+            op, version = match.group("op") or "=", parse_version(match.group("version"))
+            if op == "=":
+                low, low_inclusive, high, high_inclusive = version, True, version, True
+            elif op in (">", ">="):
+                low, low_inclusive = version, op == ">="
+            elif op in ("<", "<="):
+                high, high_inclusive = version, op == "<="
+            else:
+                # ~ / ^ und Mischformen: nur die Untergrenze ist sicher bekannt
+                low, low_inclusive = version, True
+        ranges.append(VersionRange(low, low_inclusive, high, high_inclusive))
+    return tuple(ranges)
+
+
+def _search_bucket(line):
+    """Feste Form bzw. Untergrenze in einer Zeile suchen -> Match oder None
+
+    Feste Formen haben Vorrang, auch wenn eine Untergrenze weiter vorne steht.
+    """
+    match = _BUCKET.search(line)
+    if match and match.group("floor"):
+        fixed = _FIXED.search(line, match.end())
+        if fixed:
+            return _BUCKET.match(line, fixed.start())
+    return match
+
+
+@lru_cache(maxsize=65536)
+def parse_reference(line):
+    """Eine ConstructionKit-Zeile in ein VersionSpec übersetzen (Ergebnis wird pro Zeile gecacht)"""
+    if not line:
+        return VersionSpec(line or "", "unknown")
+
+    reference = _REFERENCE.match(line)
+    user = reference.group("user") if reference else None
+    channel = reference.group("channel") if reference else None
+
+    match = _search_bucket(line)
+    if match and match.group("floor"):
+        return VersionSpec(line, "floor", (VersionRange(parse_version(match.group("floor")), True),), user, channel)
+    if match:
+        fixed = match
+        if fixed.group("exact") or fixed.group("pin"):
+            return VersionSpec(line, "exact", (exact(fixed.group("exact") or fixed.group("pin")),), user, channel)
+        if fixed.group("low"):
+            bounds = VersionRange(parse_version(fixed.group("low")), False, parse_version(fixed.group("high")), False)
+            return VersionSpec(line, "range", (bounds,), user, channel)
+        bounds = VersionRange(parse_version(fixed.group("or_low")), False, parse_version(fixed.group("or_high")), False)
+        return VersionSpec(line, "or", (exact(fixed.group("or_exact")), bounds), user, channel)
+
+    # Unbekannte Form: Bereiche trotzdem so weit wie möglich auswerten
+    ranges = ()
+    if reference:
+        version = reference.group("version")
+        ranges = _parse_ranges(version[1:-1] if version.startswith("[") else version)
+    return VersionSpec(line, "unknown", ranges, user, channel)
+
+
+def classify(line):
+    """Kategorie einer ConstructionKit-Zeile für output.json
+
+    Braucht nur einen Suchlauf mit _BUCKET und baut kein VersionSpec; für
+    Bereiche und Mindestversionen ist parse_reference da.
+    """
+    if not line:
+        return "unknown_versions"
+    match = _search_bucket(line)
+    if match is None:
+        return "unknown_versions"
+    return "latest_versions" if match.group("floor") else "fixed_versions"
+
+
+def find_constructionkit_version(content):
+    """ConstructionKit Version aus Dateiinhalt extrahieren"""
+    match = _REFERENCE_LINE.search(content)
+    return match.group(1).strip() if match else None
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Kommandozeile des RepoManagers für Cron/CI – ohne Menü, Rückfragen und Bildschirmlöschen.
+
+    python cli.py scan [--repos spx01/a spx01/b] [--pattern 'release/*'] [--concurrency 16] [--resume]
+    python cli.py update 1.44.0 [--dry-run] [--repos ...] [--pattern ...]
+    python cli.py report [--bucket latest_versions] [--below 1.44.0] [--changes] [--fail-on-findings]
+    python cli.py configure [--set concurrency=16] [--add-repo spx01/x] [--unset org]
+
+Ergebnisse gehen als JSON auf stdout, Fortschritt und Tabellen auf stderr
+(--quiet: gar nicht). Exit-Codes: 0 ok, 1 Fehler bei einzelnen Repos bzw.
+Branches, 2 Aufruf- oder Konfigurationsfehler, 3 Befunde (nur mit
+--fail-on-findings), 130 abgebrochen.
+
+main (requests, Client, Cache) wird erst von scan/update geladen; report und
+configure kommen mit der Standardbibliothek und results_store aus und starten
+entsprechend schnell. `python main.py <Befehl> ...` leitet hierher weiter.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from fnmatch import fnmatch
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_FINDINGS = 3
+EXIT_INTERRUPTED = 130
+
+# Config-Schlüssel mit Listenwert; bei --set durch Komma getrennt
+LIST_KEYS = {"repos", "include", "exclude", "extra_recipe_paths"}
+
+# Werte dieser Schlüssel erscheinen in der Ausgabe von configure nur maskiert
+SECRET_KEYS = ("secret", "token")
+
+
+class CliError(Exception):
+    """Aufruf- oder Konfigurationsfehler (Exit-Code 2)"""
+
+
+def emit(data):
+    """Ergebnis als JSON auf stdout schreiben"""
+    json.dump(data, sys.stdout, indent=4, ensure_ascii=False)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def load_config(path):
+    """config.json lesen; fehlt sie, gilt eine leere Konfiguration"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError as e:
+        raise CliError(f"{path} ist kein gültiges JSON: {e}")
+
+
+def apply_overrides(config, args):
+    """Flags auf eine Kopie der Konfiguration anwenden (wird nicht gespeichert)"""
+    config = dict(config)
+    if getattr(args, "repos", None):
+        config["repos"] = args.repos
+        config.pop("org", None)  # explizite Repos statt Organisations-Suche
+    if getattr(args, "recipe", None):
+        config["recipe_path"] = args.recipe
+    if getattr(args, "concurrency", None):
+        config["concurrency"] = args.concurrency
+    if getattr(args, "backend", None):
+        config["fetch_backend"] = args.backend
+    if getattr(args, "full", False):
+        config["incremental"] = False
+    return config
+
+
+def require(config, *keys):
+    missing = [key for key in keys if not config.get(key)]
+    if "repos" in missing and config.get("org"):
+        missing.remove("repos")
+    if missing:
+        raise CliError(f"In der Konfiguration fehlt: {', '.join(missing)} (siehe `cli.py configure --set ...`)")
+
+
+def filter_results(results, repos=None, patterns=None):
+    """Ergebnisse im output.json-Format auf Repos und Branch-Muster einschränken"""
+    output = {}
+    for repo_full, data in results["output"].items():
+        if repos and repo_full not in repos:
+            continue
+        output[repo_full] = {bucket: [entry for entry in entries
+                                      if not patterns or any(fnmatch(entry[0], p) for p in patterns)]
+                             for bucket, entries in data.items()}
+    return {**results, "output": output}
+
+
+@contextlib.contextmanager
+def progress_output(args):
+    """Fortschrittsausgaben von main nach stderr umlenken (bzw. verwerfen)"""
+    if args.quiet:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+
+
+def load_main(args):
+    """main erst bei Bedarf importieren und für den Batch-Betrieb einstellen"""
+    import main
+    if args.no_color or not sys.stderr.isatty():
+        for name in dir(main.Colors):
+            if name.isupper():
+                setattr(main.Colors, name, "")
+    return main
+
+
+def connect(main, config):
+    main.setup_client(config)
+    if not main.CLIENT.has_token():
+        raise CliError("Kein GitHub Token: GITHUB_TOKENS setzen oder \"token_file\" in config.json angeben")
+    main.CLIENT.metrics.reset()
+
+
+def request_totals(main):
+    totals = main.CLIENT.metrics.totals()
+    return {key: totals[key] for key in ("calls", "errors", "retries", "cache_hits", "throttled_seconds")}
+
+
+# --- Befehle ---------------------------------------------------------------
+
+def cmd_scan(args):
+    config = apply_overrides(load_config(args.config), args)
+    if args.pattern:
+        if len(args.pattern) > 1:
+            raise CliError("scan akzeptiert nur ein --pattern (ersetzt branch_pattern)")
+        config["branch_pattern"] = args.pattern[0]
+    require(config, "recipe_path", "branch_pattern", "repos")
+    main = load_main(args)
+    started = time.monotonic()
+    with progress_output(args):
+        connect(main, config)
+        repos = main.resolve_repos(config, refresh=args.refresh_repos)
+        log = main.ScanLog(config.get("scan_log", main.DEFAULT_SCAN_LOG))
+        resume = args.resume and log.resumable(config["recipe_path"], config["branch_pattern"])
+        summary = main.run_scan(config, repos, log, resume, args.output)
+        main.print_pool_stats()
+        main.print_cache_stats()
+        main.print_request_stats(config, "scan")
+    summary.update(resumed=resume, seconds=round(time.monotonic() - started, 3), requests=request_totals(main))
+    emit(summary)
+    return EXIT_FAILED if summary["failed_repos"] else EXIT_OK
+
+
+def cmd_update(args):
+    config = apply_overrides(load_config(args.config), args)
+    try:
+        from ckit_version import parse_version
+        parse_version(args.version)
+    except ValueError:
+        raise CliError(f"Ungültige Version: {args.version}")
+    main = load_main(args)
+    started = time.monotonic()
+    with progress_output(args):
+        connect(main, config)
+        results = main.load_update_candidates(config)
+        if results is None:
+            raise CliError("Keine Scan-Ergebnisse gefunden – erst `cli.py scan` ausführen")
+        results = filter_results(results, args.repos, args.pattern)
+        concurrency = int(config.get("concurrency", main.DEFAULT_CONCURRENCY))
+        plan = main.plan_update(results, args.version, concurrency)
+        writes = main.print_plan(plan)
+        if args.dry_run or not writes:
+            data = {"version": args.version, "dry_run": args.dry_run, "writes": writes, "plan": plan}
+            report = None
+        else:
+            report = main.run_update(results, args.version, concurrency,
+                                     config.get("scan_state_dir", main.DEFAULT_SCAN_STATE_DIR),
+                                     config.get("extra_recipe_paths", []), plan=plan)
+            main.save_update_report(config, report)
+            main.print_pool_stats()
+            main.print_request_stats(config, "update")
+            data = {**report, "writes": writes}
+    data.update(seconds=round(time.monotonic() - started, 3), requests=request_totals(main))
+    emit(data)
+    return EXIT_FAILED if report and report["failed"] else EXIT_OK
+
+
+def cmd_report(args):
+    from ckit_version import parse_version
+    from results_store import DEFAULT_PATH, ResultsStore, min_version_key, version_key
+
+    config = load_config(args.config)
+    db_path = config.get("results_db", DEFAULT_PATH)
+    # Eine fehlende Datenbank nicht nebenbei anlegen
+    store = ResultsStore(db_path) if db_path and os.path.exists(db_path) else None
+    try:
+        run = store.latest_run(args.run_offset) if store else None
+        if run:
+            results = store.output(run[0])
+        elif args.run_offset == 0 and os.path.exists(args.output):
+            with open(args.output) as f:
+                results = json.load(f)
+        else:
+            raise CliError("Keine Scan-Ergebnisse gefunden – erst `cli.py scan` ausführen")
+        results = filter_results(results, args.repos, args.pattern)
+
+        summary = {"repos": len(results["output"])}
+        for bucket in ("fixed_versions", "latest_versions", "unknown_versions"):
+            summary[bucket] = sum(len(data.get(bucket, [])) for data in results["output"].values())
+        data = {"recipe_path": results["recipe_path"],
+                "run": {"id": run[0], "started": run[1], "finished": run[2], "branch_pattern": run[4]} if run else None,
+                "summary": summary}
+        findings = []
+
+        if args.bucket:
+            data["branches"] = [{"repo": repo_full, "branch": branch, "version": version}
+                                for repo_full, info in results["output"].items()
+                                for branch, version in info.get(args.bucket, [])]
+            findings += data["branches"]
+        if args.below:
+            try:
+                limit = version_key(parse_version(args.below))
+            except ValueError:
+                raise CliError(f"Ungültige Version: {args.below}")
+            below = []
+            for repo_full, info in results["output"].items():
+                for bucket, entries in info.items():
+                    for branch, version in entries:
+                        key = min_version_key(version)
+                        if key is not None and key < limit:
+                            below.append({"repo": repo_full, "branch": branch, "bucket": bucket, "version": version})
+            data["below"] = sorted(below, key=lambda e: (min_version_key(e["version"]), e["repo"], e["branch"]))
+            findings += data["below"]
+        if args.changes:
+            previous = store.latest_run(args.run_offset + 1) if run else None
+            if previous is None:
+                raise CliError("Für --changes werden zwei gespeicherte Läufe in der Ergebnis-Datenbank benötigt")
+            changes = [{"repo": repo_full, "branch": branch,
+                        "old": dict(zip(("bucket", "version"), old)) if old else None,
+                        "new": dict(zip(("bucket", "version"), new)) if new else None}
+                       for repo_full, branch, old, new in store.changes(run[0], previous[0])
+                       if (not args.repos or repo_full in args.repos)
+                       and (not args.pattern or any(fnmatch(branch, p) for p in args.pattern))]
+            data["changes"] = {"previous_run": previous[0], "entries": changes}
+            findings += changes
+        if args.prs is not None:
+            data["prs"] = [{"created": created, "repo": repo_full, "branch": branch, "version": version, "url": url}
+                           for created, repo_full, branch, version, url in (store.prs(args.prs or None) if store else [])]
+        if args.full:
+            data["output"] = results["output"]
+    finally:
+        if store:
+            store.close()
+
+    emit(data)
+    return EXIT_FINDINGS if args.fail_on_findings and findings else EXIT_OK
+
+
+def parse_value(key, text):
+    """Wert aus --set key=value: JSON wenn möglich, Listen-Schlüssel auch kommagetrennt"""
+    try:
+        value = json.loads(text)
+    except ValueError:
+        value = text
+    if key in LIST_KEYS and isinstance(value, str):
+        value = [item.strip() for item in value.split(",") if item.strip()]
+    return value
+
+
+def masked(config):
+    return {key: ("***" if any(s in key for s in SECRET_KEYS) and value else value)
+            for key, value in config.items()}
+
+
+def cmd_configure(args):
+    config = load_config(args.config)
+    before = json.dumps(config, sort_keys=True)
+    for assignment in args.set or ():
+        key, sep, text = assignment.partition("=")
+        if not sep or not key.strip():
+            raise CliError(f"--set erwartet key=value, nicht: {assignment}")
+        config[key.strip()] = parse_value(key.strip(), text)
+    for key in args.unset or ():
+        config.pop(key, None)
+    for repo_full in args.add_repo or ():
+        if repo_full.count("/") != 1:
+            raise CliError(f"Repository muss owner/name sein: {repo_full}")
+        repos = config.setdefault("repos", [])
+        if repo_full not in repos:
+            repos.append(repo_full)
+    for repo_full in args.remove_repo or ():
+        if repo_full in config.get("repos", []):
+            config["repos"].remove(repo_full)
+
+    changed = json.dumps(config, sort_keys=True) != before
+    if changed:
+        tmp_path = args.config + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(config, f, indent=4)
+        os.replace(tmp_path, args.config)
+    missing = [key for key in ("recipe_path", "branch_pattern") if not config.get(key)]
+    if not config.get("repos") and not config.get("org"):
+        missing.append("repos")
+    emit({"config": args.config, "changed": changed, "missing": missing, "settings": masked(config)})
+    return EXIT_OK
+
+
+# --- Aufruf ----------------------------------------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config", default="config.json", help="Pfad der config.json")
+    common.add_argument("--quiet", "-q", action="store_true", help="keine Fortschrittsausgabe auf stderr")
+    common.add_argument("--no-color", action="store_true", help="keine Farbcodes (Standard, wenn stderr kein Terminal ist)")
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("--repos", nargs="+", metavar="OWNER/REPO", help="nur diese Repositories")
+    selection.add_argument("--pattern", action="append", metavar="GLOB",
+                           help="Branch-Muster (scan: ersetzt branch_pattern; sonst Filter, mehrfach möglich)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", parents=[common, selection], help="Versionen scannen")
+    scan.add_argument("--recipe", help="Recipe-Pfad statt recipe_path")
+    scan.add_argument("--concurrency", type=int)
+    scan.add_argument("--backend", choices=("rest", "graphql", "git"))
+    scan.add_argument("--full", action="store_true", help="nicht inkrementell (alle Recipes neu lesen)")
+    scan.add_argument("--resume", action="store_true", help="unterbrochenen Scan fortsetzen, falls vorhanden")
+    scan.add_argument("--refresh-repos", action="store_true", help="Organisations-Suche nicht aus dem Cache")
+    scan.add_argument("--output", default="output.json")
+    scan.set_defaults(func=cmd_scan)
+
+    update = sub.add_parser("update", parents=[common, selection], help="Latest-Branches aktualisieren")
+    update.add_argument("version", help="neue ConstructionKit-Version, z.B. 1.44.0")
+    update.add_argument("--concurrency", type=int)
+    update.add_argument("--dry-run", action="store_true", help="nur planen, nichts schreiben")
+    update.set_defaults(func=cmd_update)
+
+    report = sub.add_parser("report", parents=[common, selection], help="Ergebnisse abfragen")
+    report.add_argument("--bucket", choices=("fixed_versions", "latest_versions", "unknown_versions"))
+    report.add_argument("--below", metavar="VERSION", help="Branches, deren Mindestversion darunter liegt")
+    report.add_argument("--changes", action="store_true", help="Änderungen gegenüber dem vorherigen Lauf")
+    report.add_argument("--prs", type=int, nargs="?", const=0, metavar="N", help="erstellte PRs (die letzten N)")
+    report.add_argument("--full", action="store_true", help="komplette Ergebnisse im output.json-Format")
+    report.add_argument("--run-offset", type=int, default=0, help="0 = letzter Lauf, 1 = vorletzter, ...")
+    report.add_argument("--output", default="output.json", help="Fallback ohne Ergebnis-Datenbank")
+    report.add_argument("--fail-on-findings", action="store_true", help="Exit-Code 3, wenn etwas gefunden wurde")
+    report.set_defaults(func=cmd_report)
+
+    configure = sub.add_parser("configure", parents=[common], help="config.json ändern")
+    configure.add_argument("--set", action="append", metavar="KEY=VALUE", help="Wert setzen (JSON oder Text)")
+    configure.add_argument("--unset", action="append", metavar="KEY")
+    configure.add_argument("--add-repo", action="append", metavar="OWNER/REPO")
+    configure.add_argument("--remove-repo", action="append", metavar="OWNER/REPO")
+    configure.set_defaults(func=cmd_configure)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except CliError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        print("Abgebrochen.", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
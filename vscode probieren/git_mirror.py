@@ -0,0 +1,126 @@
+"""
+Lokale Bare-Mirrors als Scan-Backend ("fetch_backend": "git").
+
+Statt pro Branch die Contents-API aufzurufen, wird jedes Repository einmal
+als Bare-Mirror gehalten und pro Scan mit einem einzigen `git fetch`
+aktualisiert. Die Recipe-Dateien aller Branches werden anschließend über
+einen langlebigen `git cat-file --batch`-Prozess gelesen.
+
+Die Remote-URL kommt aus einer Vorlage (z.B. "https://host/{repo}.git" oder
+"/pfad/zu/{repo}.git"), daher lässt sich das Backend komplett gegen lokale
+Bare-Repositories testen.
+"""
+import base64
+import os
+import subprocess
+import threading
+
+
+class GitError(Exception):
+    """Fehlgeschlagener git-Aufruf"""
+
+
+class CatFile:
+    """Langlebiger `git cat-file --batch`-Prozess für ein Repository (nicht threadsicher)"""
+
+    def __init__(self, git_dir):
+        self.process = subprocess.Popen(
+            ["git", "--git-dir", git_dir, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self, spec):
+        """Objekt `<rev>:<pfad>` lesen -> (Inhalt als bytes, Objekt-SHA) oder (None, None)"""
+        self.process.stdin.write(spec.encode() + b"\n")
+        self.process.stdin.flush()
+        header = self.process.stdout.readline()
+        if not header:
+            raise GitError("git cat-file wurde unerwartet beendet")
+        parts = header.split()
+        if len(parts) != 3:
+            # "<spec> missing" / "<spec> ambiguous"
+            return None, None
+        sha, kind, size = parts
+        data = self.process.stdout.read(int(size))
+        self.process.stdout.read(1)  # abschließendes LF
+        if kind != b"blob":
+            return None, None
+        return data, sha.decode()
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+
+
+class GitMirror:
+    """Bare-Mirror eines Repositories mit inkrementellem Fetch"""
+
+    def __init__(self, path, remote_url, token=None):
+        self.path = path
+        self.remote_url = remote_url
+        self.token = token
+
+    def _git(self, *args):
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if self.token and self.remote_url.startswith(("http://", "https://")):
+            # Token per Umgebung übergeben, damit er weder in der Prozessliste noch in der Config landet
+            credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+            env.update(GIT_CONFIG_COUNT="1", GIT_CONFIG_KEY_0="http.extraHeader",
+                       GIT_CONFIG_VALUE_0=f"Authorization: Basic {credentials}")
+        result = subprocess.run(["git", "--git-dir", self.path, *args], env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise GitError(f"git {args[0]}: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout.decode()
+
+    def sync(self):
+        """Mirror anlegen bzw. mit einem einzigen Fetch auf den Stand des Remotes bringen"""
+        if not os.path.exists(os.path.join(self.path, "HEAD")):
+            os.makedirs(self.path, exist_ok=True)
+            self._git("init", "--bare", "--quiet")
+            self._git("config", "remote.origin.url", self.remote_url)
+            self._git("config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*")
+        self._git("fetch", "--prune", "--quiet", "--no-tags", "origin")
+
+    def branch_heads(self, prefix=""):
+        """Branches mit Head-SHA auflisten -> [(name, sha)], optional nur mit Präfix"""
+        # for-each-ref vergleicht nur ganze Pfadteile, daher bis zum letzten "/" eingrenzen
+        scope = prefix[:prefix.rfind("/") + 1]
+        out = self._git("for-each-ref", "--format=%(refname:strip=2) %(objectname)", f"refs/heads/{scope}")
+        heads = []
+        for line in out.splitlines():
+            name, sha = line.rsplit(" ", 1)
+            if name.startswith(prefix):
+                heads.append((name, sha))
+        return heads
+
+    def read_files(self, branches, path):
+        """Datei auf mehreren Branches über einen cat-file-Prozess lesen -> {branch: (Text, Blob-SHA)}"""
+        cat_file = CatFile(self.path)
+        try:
+            results = {}
+            for branch in branches:
+                data, sha = cat_file.read(f"refs/heads/{branch}:{path}")
+                results[branch] = (data.decode(errors="replace"), sha) if data is not None else (None, None)
+            return results
+        finally:
+            cat_file.close()
+
+
+class MirrorStore:
+    """Verwaltet die Mirrors aller Repositories unterhalb eines Verzeichnisses"""
+
+    def __init__(self, directory, url_template, token=None):
+        self.directory = directory
+        self.url_template = url_template
+        self.token = token
+        self.mirrors = {}
+        self.lock = threading.Lock()
+
+    def get(self, repo_full):
+        with self.lock:
+            if repo_full not in self.mirrors:
+                path = os.path.join(self.directory, *repo_full.split("/")) + ".git"
+                url = self.url_template.format(repo=repo_full)
+                self.mirrors[repo_full] = GitMirror(path, url, self.token)
+            return self.mirrors[repo_full]
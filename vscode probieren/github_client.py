@@ -0,0 +1,531 @@
+"""
+GitHub-API-Zugriff für den RepoManager – gepoolte Session mit gemeinsamer Drosselung
+und einem Pool von Tokens, deren Kontingente getrennt verwaltet werden.
+"""
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from request_metrics import RequestMetrics, endpoint_for
+
+# Statuscodes, bei denen ein erneuter Versuch sinnvoll ist
+RETRY_STATUS = {500, 502, 503, 504}
+# Methoden, die nach 5xx/Verbindungsabbruch gefahrlos wiederholt werden dürfen;
+# ein POST kann serverseitig schon durch sein (Ref/PR/Commit angelegt)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class RateLimiter:
+    """Token-Bucket, der sich an den Rate-Limit-Headern von GitHub ausrichtet.
+
+    Solange genug Kontingent übrig ist, laufen Anfragen mit `max_rate` pro
+    Sekunde. Fällt `X-RateLimit-Remaining` unter die Reserve, wird das
+    Restkontingent gleichmäßig bis `X-RateLimit-Reset` verteilt. Bei
+    403/429 (primäres oder sekundäres Limit) und 5xx wird mit Jitter
+    zurückgewichen.
+    """
+
+    def __init__(self, max_rate=20.0, burst=10, reserve=0.1, max_retries=5,
+                 base_backoff=1.0, max_backoff=60.0):
+        self.max_rate = max_rate
+        self.burst = burst
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.rate = max_rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # monotonic-Zeitpunkt, bis zu dem gar nicht angefragt wird
+        self.remaining = None
+        self.limit = None
+        self.reset = None
+        self.lock = threading.Lock()
+
+    def configure(self, max_rate=None, burst=None):
+        """Obergrenzen nachträglich setzen (z.B. aus config.json)"""
+        with self.lock:
+            if max_rate:
+                self.max_rate = float(max_rate)
+                self.rate = min(self.rate, self.max_rate) if self.remaining is not None else self.max_rate
+            if burst:
+                self.burst = int(burst)
+                self.tokens = min(self.tokens, self.burst)
+
+    def acquire(self):
+        """Blockieren, bis die nächste Anfrage gesendet werden darf"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def update(self, response):
+        """Rate-Limit-Header einer Antwort auswerten und Tempo anpassen"""
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        limit = headers.get("X-RateLimit-Limit")
+        if remaining is None or reset is None:
+            return
+
+        with self.lock:
+            self.remaining = int(remaining)
+            self.reset = int(reset)
+            self.limit = int(limit) if limit else None
+            seconds_left = max(1.0, self.reset - time.time())
+
+            if self.remaining <= 0:
+                # Kontingent erschöpft -> bis zum Reset pausieren
+                self.blocked_until = max(self.blocked_until, time.monotonic() + seconds_left)
+            elif self.remaining > (self.limit * self.reserve if self.limit else 100):
+                self.rate = self.max_rate
+            else:
+                # Restkontingent gleichmäßig bis zum Reset verteilen
+                self.rate = max(0.01, min(self.max_rate, self.remaining / seconds_left))
+
+    def backoff(self, response, attempt):
+        """Wartezeit vor dem nächsten Versuch bestimmen und alle Threads pausieren"""
+        delay = None
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                delay = float(retry_after)
+            elif response.headers.get("X-RateLimit-Remaining") == "0" and response.headers.get("X-RateLimit-Reset"):
+                delay = int(response.headers["X-RateLimit-Reset"]) - time.time()
+        if delay is None:
+            # Exponentielles Backoff mit "full jitter"
+            delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        delay = max(0.0, delay) + random.uniform(0, self.base_backoff)
+
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        return delay
+
+
+class TokenPool:
+    """Mehrere Tokens mit je eigenem Kontingent.
+
+    Jeder Token bekommt einen eigenen RateLimiter, der seine Rate-Limit-Header
+    auswertet. Eine Anfrage geht an den Token mit dem größten geschätzten
+    Restkontingent (gemeldeter Rest minus laufende Anfragen); erschöpfte oder
+    per Retry-After gesperrte Tokens werden bis zu ihrem Reset geparkt. Sind
+    alle geparkt, wartet die Anfrage auf den frühesten Reset.
+    """
+
+    def __init__(self, tokens=(), max_rate=20.0, burst=10):
+        self.max_rate = max_rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.entries = []
+        self.set_tokens(tokens)
+
+    def set_tokens(self, tokens):
+        """Tokens ersetzen; Platzhalter und Duplikate werden verworfen"""
+        tokens = [t for t in dict.fromkeys(t.strip() for t in tokens) if t and t != "..."]
+        with self.lock:
+            known = {entry["token"]: entry for entry in self.entries}
+            self.entries = [known.get(t) or {"token": t, "limiter": RateLimiter(self.max_rate, self.burst),
+                                             "inflight": 0, "requests": 0}
+                            for t in tokens]
+
+    def configure(self, max_rate=None, burst=None):
+        """Obergrenzen für alle Tokens setzen"""
+        with self.lock:
+            self.max_rate = float(max_rate) if max_rate else self.max_rate
+            self.burst = int(burst) if burst else self.burst
+            for entry in self.entries:
+                entry["limiter"].configure(max_rate, burst)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def primary(self):
+        """Erster Token (z.B. für git-URLs) oder None"""
+        return self.entries[0]["token"] if self.entries else None
+
+    @staticmethod
+    def _estimate(entry, now):
+        limiter = entry["limiter"]
+        if limiter.remaining is None or (limiter.reset is not None and now >= limiter.reset):
+            return float("inf")  # noch unbekannt bzw. Fenster schon zurückgesetzt
+        return limiter.remaining - entry["inflight"]
+
+    def acquire(self):
+        """Token für die nächste Anfrage wählen und dessen Drosselung abwarten -> Eintrag"""
+        while True:
+            with self.lock:
+                now, clock = time.time(), time.monotonic()
+                ready = [e for e in self.entries if e["limiter"].blocked_until <= clock]
+                if ready:
+                    entry = max(ready, key=lambda e: (self._estimate(e, now), -e["inflight"]))
+                    entry["inflight"] += 1
+                    entry["requests"] += 1
+                    break
+                delay = min(e["limiter"].blocked_until for e in self.entries) - clock
+            time.sleep(max(0.01, delay))
+        entry["limiter"].acquire()
+        return entry
+
+    def release(self, entry, response=None):
+        """Anfrage eines Tokens abschließen und dessen Rate-Limit-Header übernehmen"""
+        if response is not None:
+            entry["limiter"].update(response)
+        with self.lock:
+            entry["inflight"] -= 1
+
+    def stats(self):
+        """Stand pro Token (maskiert) -> [{"token", "requests", "remaining", "limit", "parked_seconds"}]"""
+        clock = time.monotonic()
+        with self.lock:
+            return [{"token": "…" + entry["token"][-4:],
+                     "requests": entry["requests"],
+                     "remaining": entry["limiter"].remaining,
+                     "limit": entry["limiter"].limit,
+                     "parked_seconds": round(max(0.0, entry["limiter"].blocked_until - clock), 1)}
+                    for entry in self.entries]
+
+
+def load_tokens(path=None, env_value=None):
+    """Tokens aus einer Datei (ein Token pro Zeile, # für Kommentare) und/oder einer
+    durch Komma/Leerraum getrennten Umgebungsvariable lesen -> Liste ohne Duplikate"""
+    tokens = []
+    if env_value:
+        tokens.extend(env_value.replace(",", " ").split())
+    if path:
+        with open(path) as f:
+            for line in f:
+                tokens.extend(line.split("#", 1)[0].replace(",", " ").split())
+    return [t for t in dict.fromkeys(tokens) if t]
+
+
+def is_rate_limited(response):
+    """Prüfen, ob eine 403/429-Antwort ein (sekundäres) Rate-Limit ist und kein Rechteproblem"""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    if response.headers.get("Retry-After") or response.headers.get("X-RateLimit-Remaining") == "0":
+        return True
+    return "rate limit" in response.text.lower()
+
+
+def _body_size(body):
+    """Größe eines Request-Bodys (bytes, str oder None)"""
+    if body is None:
+        return 0
+    return len(body.encode() if isinstance(body, str) else body)
+
+
+def _received_size(response, stream=False):
+    """Größe des Response-Bodys; Streams zählen erst beim Schließen (siehe _hold_stream)"""
+    if response is None or stream:
+        return 0
+    return len(response.content)
+
+
+class GitHubAPIError(Exception):
+    """Unerwarteter Statuscode einer REST-Antwort"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def check_response(r, action, expected=(200, 201)):
+    """Antwort prüfen und bei unerwartetem Status eine GitHubAPIError auslösen"""
+    if r.status_code not in expected:
+        try:
+            message = r.json().get("message", r.text)
+        except ValueError:
+            message = r.text
+        raise GitHubAPIError(f"{action}: {r.status_code} {message}", status=r.status_code)
+    return r
+
+
+class GraphQLError(Exception):
+    """Fehlgeschlagene GraphQL-Abfrage (HTTP-Fehler oder Fehler im Antwort-Body)"""
+
+    def __init__(self, message, status=None, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors or []
+
+
+def graphql_url_for(base_url):
+    """GraphQL-Endpunkt zur REST-Basis ableiten (GHE: /api/v3 -> /api/graphql)"""
+    if base_url.endswith("/api/v3"):
+        return base_url[:-len("/api/v3")] + "/api/graphql"
+    return base_url + "/graphql"
+
+
+class GitHubClient:
+    """Gemeinsamer API-Client: persistente Session mit Connection-Pool, Auth und Drosselung.
+
+    Alle Helfer in main.py teilen sich eine Instanz, damit TCP/TLS-Verbindungen
+    per Keep-Alive wiederverwendet werden statt pro Aufruf neu aufgebaut.
+    """
+
+    def __init__(self, base_url, token=None, pool_size=10, limiter=None, cache=None, graphql_url=None,
+                 metrics=None):
+        self.base_url = base_url.rstrip("/")
+        self.graphql_url = graphql_url or graphql_url_for(self.base_url)
+        self.limiter = limiter or RateLimiter()
+        self.tokens = TokenPool([token] if token else (), self.limiter.max_rate, self.limiter.burst)
+        self.cache = cache
+        self.metrics = metrics or RequestMetrics()
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+        self.pool_size = None
+        self.configure_pool(pool_size)
+
+    def set_base_url(self, base_url, graphql_url=None):
+        """REST-Basis (und GraphQL-Endpunkt) umstellen, z.B. auf einen lokalen Mock-Server"""
+        self.base_url = base_url.rstrip("/")
+        self.graphql_url = graphql_url or graphql_url_for(self.base_url)
+
+    @property
+    def token(self):
+        """Erster konfigurierter Token (oder None)"""
+        return self.tokens.primary
+
+    def set_token(self, token):
+        """Einen einzelnen Token für alle folgenden Anfragen setzen"""
+        self.tokens.set_tokens([token] if token else ())
+
+    def set_tokens(self, tokens):
+        """Mehrere Tokens setzen; Anfragen werden nach Restkontingent auf sie verteilt"""
+        self.tokens.set_tokens(tokens)
+
+    def has_token(self):
+        """Prüfen, ob mindestens ein echter Token hinterlegt ist"""
+        return len(self.tokens) > 0
+
+    def configure_rate(self, max_rate=None, burst=None):
+        """Obergrenzen für die gemeinsame Drosselung und jeden einzelnen Token setzen"""
+        self.limiter.configure(max_rate, burst)
+        self.tokens.configure(max_rate, burst)
+
+    def configure_pool(self, pool_size):
+        """Connection-Pool auf die gewünschte Parallelität einstellen
+
+        Ebenso viele Slots begrenzen die gleichzeitig laufenden Anfragen über
+        alle Threads hinweg – auch wenn Aufrufer selbst weiter auffächern
+        (z.B. Folgeseiten in get_paginated), bleibt es bei `pool_size`
+        Verbindungen.
+        """
+        pool_size = max(1, int(pool_size))
+        if pool_size == self.pool_size:
+            return
+        self.pool_size = pool_size
+        self.slots = threading.BoundedSemaphore(pool_size)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path):
+        """Relativen API-Pfad zur vollständigen URL ergänzen"""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        """HTTP-Anfrage mit Drosselung und automatischen Wiederholungen"""
+        url = self.url(path)
+        headers = dict(kwargs.pop("headers", None) or {})
+
+        # Bedingte Anfrage, falls eine frühere Antwort im Cache liegt (auch bei stream=True)
+        cache_key = None
+        if self.cache is not None and method == "GET":
+            cache_key = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+            accept = headers.get("Accept", self.session.headers["Accept"])
+            if accept != "application/vnd.github.v3+json":
+                cache_key = f"{cache_key} [{accept}]"
+            headers.update(self.cache.validators(cache_key))
+
+        endpoint = endpoint_for(method, url, urlparse(self.base_url).path)
+        r = self._send(method, url, dict(headers), kwargs, endpoint)  # _send setzt den Token-Header
+
+        if cache_key is not None:
+            if r.status_code == 304:
+                entry = self.cache.hit(cache_key)  # zählt selbst als Fehlschlag, falls der Eintrag fehlt
+                r.close()
+                if entry is not None:
+                    self.metrics.cache_hit(endpoint, len(entry[3]))
+                    return self._cached_response(r, entry)
+                # Eintrag wurde inzwischen verdrängt (anderer Thread/Prozess) -> ohne Validatoren neu anfragen
+                headers.pop("If-None-Match", None)
+                headers.pop("If-Modified-Since", None)
+                r = self._send(method, url, headers, kwargs, endpoint)
+            else:
+                self.cache.miss()
+            if r.status_code == 200:
+                if kwargs.get("stream"):
+                    r.cache_key = cache_key  # speichert der Aufrufer nach vollständigem Lesen (store_streamed)
+                else:
+                    self.cache.store(cache_key, r.headers, r.content)
+        return r
+
+    def store_streamed(self, r, body):
+        """Vollständig gelesenen Body einer gestreamten Antwort in den ETag-Cache übernehmen"""
+        cache_key = getattr(r, "cache_key", None)
+        if cache_key is not None and self.cache is not None:
+            self.cache.store(cache_key, r.headers, body)
+
+    def _send(self, method, url, headers, kwargs, endpoint):
+        """Anfrage senden, dabei drosseln und bei 5xx/Rate-Limits wiederholen
+
+        Jeder Versuch wählt den Token mit dem größten Restkontingent; ein
+        Rate-Limit parkt nur diesen Token, der nächste Versuch nimmt einen
+        anderen. Gemessen werden die reine Netzwerkzeit aller Versuche und
+        getrennt davon die Wartezeit in der Drosselung (inkl. Backoff und
+        Warten auf einen freien Slot). Der Slot wird mit der Antwort frei, bei
+        stream=True erst beim Schließen der Antwort.
+
+        Nach 5xx oder abgebrochener Verbindung werden nur idempotente Methoden
+        wiederholt (POST/PATCH nur, wenn die Verbindung gar nicht zustande
+        kam); Rate-Limits wurden nicht ausgeführt und gelten für alle.
+        """
+        attempt = 0
+        latency = throttled = 0.0
+        r = None
+        pooled = "Authorization" not in headers and self.has_token()
+        stream = kwargs.get("stream")
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        try:
+            while True:
+                waited = time.monotonic()
+                slots = self.slots
+                slots.acquire()
+                self.limiter.acquire()
+                entry = self.tokens.acquire() if pooled else None
+                if entry is not None:
+                    headers["Authorization"] = f"token {entry['token']}"
+                sent = time.monotonic()
+                throttled += sent - waited
+                try:
+                    r = self.session.request(method, url, headers=headers, **kwargs)
+                except BaseException as e:
+                    slots.release()
+                    if not isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                        raise
+                    latency += time.monotonic() - sent
+                    if entry is not None:
+                        self.tokens.release(entry)
+                    if attempt >= self.limiter.max_retries or \
+                            not (idempotent or isinstance(e, requests.ConnectTimeout)):
+                        raise
+                    self.limiter.backoff(None, attempt)
+                    attempt += 1
+                    continue
+                latency += time.monotonic() - sent
+                if not stream:
+                    slots.release()  # Body ist gelesen, die Verbindung zurück im Pool
+
+                if entry is not None:
+                    self.tokens.release(entry, r)
+                else:
+                    self.limiter.update(r)
+                rate_limited = is_rate_limited(r)
+                retry = (idempotent and r.status_code in RETRY_STATUS) or rate_limited
+                if not retry or attempt >= self.limiter.max_retries:
+                    if stream:
+                        self._hold_stream(r, endpoint, slots)
+                    return r
+                if stream:
+                    r.close()  # sonst bleibt die Verbindung belegt
+                    slots.release()
+                if rate_limited and entry is not None:
+                    entry["limiter"].backoff(r, attempt)  # nur diesen Token parken
+                else:
+                    self.limiter.backoff(r, attempt)
+                attempt += 1
+        finally:
+            self.metrics.record(endpoint, latency, r.status_code if r is not None else None,
+                                _body_size(r.request.body) if r is not None else 0,
+                                _received_size(r, stream), throttled, attempt)
+
+    def _hold_stream(self, r, endpoint, slots):
+        """Gestreamte Antwort: Slot erst beim Schließen freigeben und dann die gelesenen Bytes erfassen
+
+        Gezählt wird r.raw.tell(), also die Bytes auf der Leitung (bei
+        Content-Encoding komprimiert) – ein abgebrochener Stream zählt nur,
+        was wirklich gelesen wurde.
+        """
+        close = r.close
+        closed = []
+
+        def close_and_release():
+            if not closed:
+                closed.append(True)
+                self.metrics.add_received(endpoint, r.raw.tell() if hasattr(r.raw, "tell") else 0)
+                slots.release()
+            close()
+
+        r.close = close_and_release
+
+    @staticmethod
+    def _cached_response(not_modified, entry):
+        """Aus einer 304-Antwort und dem Cache-Eintrag eine vollständige 200-Antwort bauen"""
+        _, _, headers, body = entry
+        r = requests.Response()
+        r.status_code = 200
+        r.headers = requests.structures.CaseInsensitiveDict(headers)
+        r.headers.update(not_modified.headers)
+        r.headers["Content-Length"] = str(len(body))  # die 304 selbst meldet 0
+        r._content = body
+        r._content_consumed = True  # iter_content liefert dann den gespeicherten Body
+        r.url = not_modified.url
+        r.request = not_modified.request
+        r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+        return r
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def graphql(self, query, variables=None):
+        """GraphQL-Abfrage senden -> (data, errors); HTTP-Fehler lösen eine Exception aus"""
+        r = self.post(self.graphql_url, json={"query": query, "variables": variables or {}})
+        if r.status_code != 200:
+            raise GraphQLError(f"GraphQL HTTP {r.status_code}: {r.text[:200]}", status=r.status_code)
+        payload = r.json()
+        return payload.get("data"), payload.get("errors") or []
+
+    def pool_stats(self):
+        """Verbindungsstatistik pro Host: neu aufgebaute Verbindungen vs. gesendete Anfragen"""
+        stats = {}
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = f"{pool.scheme}://{pool.host}:{pool.port}"
+                entry = stats.setdefault(host, {"requests": 0, "connections": 0})
+                entry["requests"] += pool.num_requests
+                entry["connections"] += pool.num_connections
+        for entry in stats.values():
+            entry["reused"] = max(0, entry["requests"] - entry["connections"])
+        return stats
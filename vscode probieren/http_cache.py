@@ -0,0 +1,118 @@
+"""
+Persistenter HTTP-Cache für bedingte GitHub-Anfragen (ETag / Last-Modified).
+
+Antworten werden in einer SQLite-Datei abgelegt. Beim nächsten Lauf schickt
+der Client `If-None-Match` bzw. `If-Modified-Since` mit; ein 304 wird aus dem
+lokalen Eintrag bedient und zählt bei GitHub nicht gegen das Rate-Limit.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """Größenbegrenzter LRU-Cache für GET-Antworten, Schlüssel ist die vollständige URL inkl. ref"""
+
+    def __init__(self, path=".http_cache.sqlite", max_bytes=100 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.db.commit()
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, key):
+        """Gespeicherten Eintrag holen -> (etag, last_modified, headers, body) oder None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, headers, body FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return etag, last_modified, json.loads(headers), body
+
+    def validators(self, key):
+        """Header für eine bedingte Anfrage zusammenstellen"""
+        entry = self.lookup(key)
+        if entry is None:
+            return {}
+        etag, last_modified, _, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def hit(self, key):
+        """304 erhalten: Eintrag als zuletzt benutzt markieren und zurückgeben"""
+        entry = self.lookup(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        return entry
+
+    def miss(self):
+        """Antwort kam nicht aus dem Cache"""
+        with self.lock:
+            self.misses += 1
+
+    def store(self, key, headers, body):
+        """Antwort mit ETag/Last-Modified speichern und ggf. alte Einträge verdrängen"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        with self.lock:
+            if not etag and not last_modified:
+                return
+            if len(body) > self.max_bytes:
+                return
+            old = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old:
+                self.total -= old[0]
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(dict(headers)), body, len(body), time.time()))
+            self.total += len(body)
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Am längsten nicht benutzte Einträge löschen, bis die Größengrenze passt"""
+        while self.total > self.max_bytes:
+            row = self.db.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 1").fetchone()
+            if row is None:
+                self.total = 0
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self.total -= row[1]
+            self.evictions += 1
+
+    def stats(self):
+        """Treffer-/Fehlschlag-Zähler für die Ausgabe am Ende eines Scans"""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries_bytes": self.total}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
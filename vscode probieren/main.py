@@ -4,15 +4,31 @@ RepoManager – Repository-Updater & -Ausleser mit ConstructionKit Integration
 Integriert das ConstructionKit-Verwaltungstool in eine benutzerfreundliche Oberfläche.
 """
 import sys
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Mit Argumenten ohne Menü (Cron/CI), siehe cli.py – vor den schweren Importen
+    # weiterleiten, sonst lädt cli.py main.py als Modul ein zweites Mal
+    import cli
+    sys.exit(cli.main(sys.argv[1:]))
+
 import os
 import json
 import re
 import time
-import requests
 import base64
 import fnmatch
+from urllib.parse import urlparse, parse_qs
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
+from github_client import GitHubClient, GitHubAPIError, GraphQLError, check_response, load_tokens
+from http_cache import HttpCache
+from ckit_version import classify, find_constructionkit_version
+from scan_log import ScanLog, BUCKET_KEYS, write_output
+from git_mirror import MirrorStore
+from results_store import ResultsStore, DEFAULT_PATH
+
 # ANSI-Farbcodes für die Konsole
 class Colors:
     RED = '\033[91m'
@@ -29,11 +45,74 @@ class Colors:
 
 # GitHub-Konfiguration
 GITHUB_TOKEN = "..."  # Hier dein GitHub Token einfügen
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3+json"}
+# Mehrere Tokens (z.B. Service-Accounts): GITHUB_TOKENS="t1,t2" oder "token_file" in config.json
+# (ein Token pro Zeile); Anfragen werden nach Restkontingent auf alle verteilt
+GITHUB_TOKENS = os.environ.get("GITHUB_TOKENS")
+# API-Basis: Umgebungsvariable vor "api_url" in config.json vor dem Standard
+DEFAULT_API_URL = "https://github.psa-cloud.com/api/v3"
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", DEFAULT_API_URL)
+GITHUB_GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL")  # Standard: aus der API-Basis abgeleitet
+
+# Standardwert für gleichzeitige API-Anfragen (in config.json über "concurrency" änderbar)
+DEFAULT_CONCURRENCY = 8
+
+# Verzeichnis für den inkrementellen Scan-Zustand (Head-/Blob-SHA pro Branch)
+DEFAULT_SCAN_STATE_DIR = "scan_state"
+
+# Append-only Protokoll des laufenden Scans (für Wiederaufnahme nach Abbruch)
+DEFAULT_SCAN_LOG = "scan_log.jsonl"
+
+# Verzeichnis und Remote-URL-Vorlage für das Backend "git" (lokale Bare-Mirrors)
+DEFAULT_MIRROR_DIR = ".mirrors"
+DEFAULT_GIT_URL_TEMPLATE = "https://github.psa-cloud.com/{repo}.git"
+
+# Indizierte Ablage aller Scan-Läufe und PRs (in config.json über "results_db" änderbar, false = aus)
+DEFAULT_RESULTS_DB = DEFAULT_PATH
+
+# Zwischenspeicher der Repository-Ermittlung einer Organisation ("org" in config.json)
+DEFAULT_DISCOVERY_CACHE = ".discovered_repos.json"
+DEFAULT_DISCOVERY_TTL_HOURS = 24
+
+# Persistenter ETag-Cache (in config.json über "http_cache" änderbar, false = aus)
+DEFAULT_HTTP_CACHE = ".http_cache.sqlite"
+
+# Gemeinsamer API-Client (Session, Token, Drosselung) für alle Helfer
+CLIENT = GitHubClient(GITHUB_API_URL, token=GITHUB_TOKEN, pool_size=DEFAULT_CONCURRENCY,
+                      graphql_url=GITHUB_GRAPHQL_URL)
+
+# Seitengröße für Listen-Endpunkte und parallele Abrufe der Folgeseiten. Alle
+# Aufrufer teilen sich einen Pool; wie viele Anfragen insgesamt gleichzeitig
+# laufen, begrenzen die Slots des CLIENT (= "concurrency").
+MAX_PER_PAGE = 100
+PAGE_CONCURRENCY = 4
+PAGE_POOL = ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY, thread_name_prefix="page")
+
+# Mirrors für das Backend "git" (wird in setup_mirrors() angelegt)
+MIRRORS = None
+
+# Recipe-Dateien beim Backend "rest" als Rohdaten streamen und nach der
+# ConstructionKit-Zeile abbrechen (in config.json über "stream_recipes" abschaltbar)
+STREAM_RECIPES = True
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+STREAM_CHUNK_SIZE = 4096
+# Ist nach dem Fund höchstens so viel übrig, wird zu Ende gelesen: die Verbindung
+# bleibt dann im Pool und der vollständige Inhalt steht für Updates bereit
+STREAM_DRAIN_BYTES = 16 * 1024
+
+# Branches pro GraphQL-Abfrage beim Backend "graphql" (wird bei Kostenfehlern automatisch halbiert)
+GRAPHQL_CHUNK_SIZE = 50
+
+_print_lock = threading.Lock()
+
+def locked_print(*lines):
+    """Mehrere Zeilen am Stück ausgeben, ohne dass sich Threads dazwischenschieben"""
+    with _print_lock:
+        for line in lines:
+            print(line)
 
 def clear_screen():
-    """Bildschirm leeren"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """Bildschirm per ANSI-Escape leeren (ohne Shell-Prozess)"""
+    print("\033[2J\033[H", end="", flush=True)
 
 def print_banner():
     """Schönen Banner mit Farben ausgeben"""
@@ -62,83 +141,761 @@ def print_menu():
     
     print(f"{Colors.BLUE}{'─'*50}{Colors.RESET}")
 
-def get_branches(owner, repo, limit=None):
+def get_paginated(path, params=None, description="data"):
+    """Alle Seiten eines Listen-Endpunkts abrufen
+
+    Die erste Seite wird mit maximaler Seitengröße geholt; nennt der
+    `Link`-Header eine letzte Seite, werden die restlichen Seiten über den
+    gemeinsamen PAGE_POOL parallel abgerufen und in Seitenreihenfolge angehängt. Schlägt eine Seite fehl,
+    wird eine GitHubAPIError ausgelöst statt eine unvollständige Liste
+    zurückzugeben – Aufrufer dürfen fehlende Einträge nie als gelöscht deuten.
+    """
+    params = dict(params or {}, per_page=MAX_PER_PAGE)
+    r = check_response(CLIENT.get(path, params=params), f"Abruf von {description}", expected=(200,))
+    items = list(r.json())
+
+    last_url = r.links.get("last", {}).get("url")
+    if not last_url:
+        return items
+    last_page = int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0])
+    pages = range(2, last_page + 1)
+    if not pages:
+        return items
+
+    futures = [PAGE_POOL.submit(CLIENT.get, path, params=dict(params, page=page)) for page in pages]
+    for future in futures:
+        items.extend(check_response(future.result(), f"Abruf von {description}", expected=(200,)).json())
+    return items
+
+def glob_prefix(pattern):
+    """Literalen Anfang eines Glob-Musters bestimmen ("release/*" -> "release/")"""
+    match = re.search(r"[*?\[]", pattern)
+    return pattern[:match.start()] if match else pattern
+
+def get_branches(owner, repo, limit=None, pattern=None):
     """Branches eines Repositories abrufen"""
-    url = f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/branches"
-    branches = []
-    page = 1
-    per_page = 30
+    return [name for name, _ in get_branch_heads(owner, repo, limit, pattern)]
 
-    while True:
-        params = {"per_page": per_page, "page": page}
-        r = requests.get(url, headers=HEADERS, params=params)
-        if r.status_code != 200:
-            print(f"{Colors.RED}❌ Error fetching branches for {owner}/{repo}: {r.status_code} {r.text}{Colors.RESET}")
-            break
-        data = r.json()
-        branches.extend([b["name"] for b in data])
-        if len(data) < per_page or (limit and len(branches) >= limit):
-            break
-        page += 1
+def get_branch_heads(owner, repo, limit=None, pattern=None):
+    """Branches eines Repositories samt Head-Commit-SHA abrufen -> [(name, sha)]
+
+    Mit `pattern` wird der literale Präfix des Globs serverseitig über
+    git/matching-refs gefiltert, statt alle Branches zu laden. Das vollständige
+    Muster muss der Aufrufer weiterhin per fnmatch anwenden.
+    """
+    prefix = glob_prefix(pattern) if pattern else ""
+    if prefix:
+        refs = get_paginated(f"/repos/{owner}/{repo}/git/matching-refs/heads/{prefix}",
+                             description=f"branches for {owner}/{repo}")
+        branches = [(ref["ref"][len("refs/heads/"):], ref["object"]["sha"]) for ref in refs]
+    else:
+        data = get_paginated(f"/repos/{owner}/{repo}/branches", description=f"branches for {owner}/{repo}")
+        branches = [(b["name"], b["commit"]["sha"]) for b in data]
 
     return branches[:limit] if limit else branches
 
 def get_file_content(owner, repo, path, branch):
     """Dateiinhalt von GitHub abrufen"""
-    url = f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/contents/{path}?ref={branch}"
-    r = requests.get(url, headers=HEADERS)
+    r = CLIENT.get(f"/repos/{owner}/{repo}/contents/{path}", params={"ref": branch})
     if r.status_code == 200:
         content = r.json()
         return base64.b64decode(content["content"]).decode(), content["sha"]
     return None, None
 
-def find_constructionkit_version(content):
-    """ConstructionKit Version aus Dateiinhalt extrahieren"""
-    for line in content.splitlines():
-        if line.strip().startswith("constructionkit/"):
-            return line.strip()
-    return None
+def stream_file_reference(owner, repo, path, branch):
+    """ConstructionKit-Zeile einer Datei per Raw-Media-Type zeilenweise lesen
+    -> (Inhalt oder Zeile, vollständig?) bzw. (None, False), wenn die Datei fehlt
+
+    Der Body wird in Blöcken gelesen und abgebrochen, sobald die Zeile gefunden
+    ist. Liegt der Rest unter STREAM_DRAIN_BYTES, wird er noch gelesen und der
+    vollständige Inhalt zurückgegeben. Der Rest wird aus Content-Length und den
+    bisher gelesenen Bytes auf der Leitung (r.raw.tell()) bestimmt, da
+    Content-Length bei Content-Encoding die komprimierte Größe angibt.
+    Vollständig gelesene Inhalte landen im ETag-Cache. Ignoriert der Server
+    den Raw-Media-Type und liefert JSON, wird auf get_file_content
+    ausgewichen. Eine Blob-SHA liefert dieser Weg nicht; wer sie zum
+    Schreiben braucht, nimmt get_file_content.
+    """
+    r = CLIENT.get(f"/repos/{owner}/{repo}/contents/{path}", params={"ref": branch},
+                   headers={"Accept": RAW_MEDIA_TYPE}, stream=True)
+    try:
+        if r.status_code == 404:
+            return None, False
+        check_response(r, f"{path} lesen", expected=(200,))
+        if r.headers.get("Content-Type", "").startswith("application/json"):
+            r.close()
+            content, _ = get_file_content(owner, repo, path, branch)
+            return content, content is not None
+        size = int(r.headers.get("Content-Length") or 0)
+        chunks, pending = [], b""
+        stream = r.iter_content(STREAM_CHUNK_SIZE)
+        for chunk in stream:
+            chunks.append(chunk)
+            *lines, pending = (pending + chunk).split(b"\n")
+            version = next(filter(None, (find_constructionkit_version(line.decode(errors="replace"))
+                                         for line in lines)), None)
+            if version:
+                # Antwort aus dem Cache (raw ist None) liegt schon vollständig vor
+                remaining = size - r.raw.tell() if r.raw is not None else 0
+                if not size or remaining > STREAM_DRAIN_BYTES:
+                    return version, False
+                chunks.extend(stream)
+                break
+        body = b"".join(chunks)
+        CLIENT.store_streamed(r, body)
+        return body.decode(errors="replace"), True
+    finally:
+        r.close()
+
+def get_file_contents_batch(owner, repo, path, branches):
+    """Dateiinhalt mehrerer Branches per GraphQL abrufen -> {branch: (content, sha)}
+
+    Pro Abfrage werden bis zu GRAPHQL_CHUNK_SIZE Branches als Alias-Felder
+    angefragt. Meldet GitHub Kosten-/Knotenlimits oder einen Timeout, wird der
+    Block halbiert und erneut versucht. Abgeschnittene Blobs werden per REST
+    nachgeladen.
+    """
+    results = {}
+    for i in range(0, len(branches), GRAPHQL_CHUNK_SIZE):
+        results.update(_fetch_blob_chunk(owner, repo, path, branches[i:i + GRAPHQL_CHUNK_SIZE]))
+    return results
+
+def _fetch_blob_chunk(owner, repo, path, branches):
+    """Einen Block Branches in einer GraphQL-Abfrage lesen, bei Limits rekursiv teilen"""
+    fields = "\n".join(
+        f"    b{i}: object(expression: {json.dumps(f'{branch}:{path}')}) {{ ... on Blob {{ text oid isTruncated }} }}"
+        for i, branch in enumerate(branches))
+    query = f"query($owner: String!, $name: String!) {{\n  repository(owner: $owner, name: $name) {{\n{fields}\n  }}\n}}"
+
+    try:
+        data, errors = CLIENT.graphql(query, {"owner": owner, "name": repo})
+    except GraphQLError as e:
+        if e.status in (502, 504) and len(branches) > 1:
+            return _split_blob_chunk(owner, repo, path, branches)
+        raise
+    if errors:
+        types = {err.get("type") for err in errors}
+        if types & {"MAX_NODE_LIMIT_EXCEEDED", "RESOURCE_LIMITS_EXCEEDED", "TIMEOUT"} and len(branches) > 1:
+            return _split_blob_chunk(owner, repo, path, branches)
+        if not data or not data.get("repository"):
+            raise GraphQLError(f"GraphQL: {errors[0].get('message', errors[0])}", errors=errors)
+
+    repository = data["repository"]
+    results = {}
+    for i, branch in enumerate(branches):
+        blob = repository.get(f"b{i}")
+        if not blob or blob.get("text") is None:
+            results[branch] = (None, None)
+        elif blob.get("isTruncated"):
+            results[branch] = get_file_content(owner, repo, path, branch)
+        else:
+            results[branch] = (blob["text"], blob["oid"])
+    return results
+
+def _split_blob_chunk(owner, repo, path, branches):
+    half = len(branches) // 2
+    results = _fetch_blob_chunk(owner, repo, path, branches[:half])
+    results.update(_fetch_blob_chunk(owner, repo, path, branches[half:]))
+    return results
 
 def update_version_in_content(content, new_version):
-    """Version in Dateiinhalt aktualisieren"""
-    lines = content.splitlines()
+    """Version in Dateiinhalt aktualisieren
+
+    Zeilenenden (auch ein abschließender Zeilenumbruch) bleiben erhalten, damit
+    ein bereits aktuelles Recipe unverändert zurückkommt.
+    """
+    lines = content.splitlines(keepends=True)
     for i, line in enumerate(lines):
         if line.strip().startswith("constructionkit/"):
-            lines[i] = f"constructionkit/{new_version}@spx00/release"
-    return "\n".join(lines)
-
-def create_branch(owner, repo, base_branch, new_branch):
-    """Neuen Branch erstellen"""
-    url = f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/git/refs/heads/{base_branch}"
-    r = requests.get(url, headers=HEADERS)
-    sha = r.json()["object"]["sha"]
-    data = {"ref": f"refs/heads/{new_branch}", "sha": sha}
-    requests.post(f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/git/refs", headers=HEADERS, json=data)
-
-def update_file(owner, repo, path, content, sha, branch, message):
-    """Datei in GitHub aktualisieren"""
-    url = f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/contents/{path}"
-    data = {
-        "message": message,
-        "content": base64.b64encode(content.encode()).decode(),
-        "sha": sha,
-        "branch": branch
-    }
-    requests.put(url, headers=HEADERS, json=data)
+            ending = line[len(line.rstrip("\r\n")):]
+            lines[i] = f"constructionkit/{new_version}@spx00/release{ending}"
+    return "".join(lines)
+
+def get_branch_sha(owner, repo, branch):
+    """Aktuellen Head-Commit eines Branches abrufen"""
+    r = check_response(CLIENT.get(f"/repos/{owner}/{repo}/git/ref/heads/{branch}"), "Branch lesen")
+    return r.json()["object"]["sha"]
+
+def commit_files(owner, repo, base_sha, new_branch, files, message, existing=False):
+    """Mehrere Dateien in einem einzigen Commit auf einem neuen Branch ablegen (Git Data API)
+
+    Die Inhalte werden direkt in den Tree eingebettet, statt je Datei einen Blob
+    anzulegen. Damit bleibt es unabhängig von der Anzahl der Dateien bei einem
+    Lesezugriff (Basis-Commit) und drei Schreibzugriffen: Tree, Commit, Ref.
+    Mit `existing` wird ein vorhandener Branch (Head = `base_sha`) ohne Force
+    weitergesetzt statt neu angelegt.
+    """
+    r = check_response(CLIENT.get(f"/repos/{owner}/{repo}/git/commits/{base_sha}"), "Basis-Commit lesen")
+    base_tree = r.json()["tree"]["sha"]
+
+    tree = [{"path": path, "mode": "100644", "type": "blob", "content": content}
+            for path, content in sorted(files.items())]
+    r = check_response(CLIENT.post(f"/repos/{owner}/{repo}/git/trees", json={"base_tree": base_tree, "tree": tree}),
+                       "Tree erstellen")
+    tree_sha = r.json()["sha"]
+
+    r = check_response(CLIENT.post(f"/repos/{owner}/{repo}/git/commits",
+                                   json={"message": message, "tree": tree_sha, "parents": [base_sha]}),
+                       "Commit erstellen")
+    commit_sha = r.json()["sha"]
+
+    if existing:
+        check_response(CLIENT.patch(f"/repos/{owner}/{repo}/git/refs/heads/{new_branch}",
+                                    json={"sha": commit_sha, "force": False}),
+                       "Branch aktualisieren")
+    else:
+        check_response(CLIENT.post(f"/repos/{owner}/{repo}/git/refs",
+                                   json={"ref": f"refs/heads/{new_branch}", "sha": commit_sha}),
+                       "Branch erstellen")
+    return commit_sha
 
 def create_pull_request(owner, repo, head, base, title, body):
     """Pull Request erstellen"""
-    url = f"https://github.psa-cloud.com/api/v3/repos/{owner}/{repo}/pulls"
+    url = f"/repos/{owner}/{repo}/pulls"
     data = {"title": title, "head": head, "base": base, "body": body}
-    r = requests.post(url, headers=HEADERS, json=data)
+    r = check_response(CLIENT.post(url, json=data), "Pull Request erstellen")
     return r.json()["html_url"]
 
+def update_pull_request(owner, repo, number, title, body):
+    """Titel und Beschreibung eines offenen Pull Requests ersetzen"""
+    check_response(CLIENT.patch(f"/repos/{owner}/{repo}/pulls/{number}", json={"title": title, "body": body}),
+                   "Pull Request aktualisieren", expected=(200,))
+
+def classify_content(branch, content):
+    """Recipe-Inhalt eines Branches klassifizieren -> (Kategorie, Version, Ausgabezeile)"""
+    if not content:
+        return "unknown_versions", '', f"    {Colors.RED}❌ {branch}: Datei nicht gefunden{Colors.RESET}"
+
+    current_version = find_constructionkit_version(content)
+    if not current_version:
+        return "unknown_versions", '', f"    {Colors.YELLOW}⚠️  {branch}: Keine ConstructionKit Version gefunden{Colors.RESET}"
+
+    return classify(current_version), current_version, f"    {Colors.GREEN}✓ {branch}: {current_version}{Colors.RESET}"
+
+def scan_branches(owner, repo, recipe_path, branches, backend="rest"):
+    """Recipe-Dateien einer Gruppe von Branches abrufen und klassifizieren
+    -> Liste von (Kategorie, Version, Ausgabezeile, Blob-SHA, Inhalt)
+
+    Beim Backend "rest" enthält die Gruppe genau einen Branch (ein Contents-Aufruf),
+    beim Backend "graphql" einen ganzen Block, der in einer Abfrage gelesen wird,
+    beim Backend "git" alle Branches des Repos (ein cat-file-Prozess im Mirror).
+    Beim Backend "rest" wird die Datei gestreamt (siehe stream_file_reference);
+    Blob-SHA und – bei abgebrochenem Lesen – Inhalt bleiben dann leer.
+    """
+    if backend == "graphql":
+        contents = get_file_contents_batch(owner, repo, recipe_path, branches)
+    elif backend == "git":
+        contents = MIRRORS.get(f"{owner}/{repo}").read_files(branches, recipe_path)
+    elif STREAM_RECIPES:
+        results = []
+        for branch in branches:
+            text, complete = stream_file_reference(owner, repo, recipe_path, branch)
+            # Nur vollständige Inhalte taugen später als Update-Grundlage
+            results.append(classify_content(branch, text) + (None, text if complete else None))
+        return results
+    else:
+        contents = {branch: get_file_content(owner, repo, recipe_path, branch) for branch in branches}
+    return [classify_content(branch, contents[branch][0]) + (contents[branch][1], contents[branch][0])
+            for branch in branches]
+
+def list_branch_heads(owner, repo, branch_pattern, backend="rest"):
+    """Branch-Heads für den Scan ermitteln – per API oder aus dem frisch synchronisierten Mirror"""
+    if backend == "git":
+        mirror = MIRRORS.get(f"{owner}/{repo}")
+        mirror.sync()
+        return mirror.branch_heads(glob_prefix(branch_pattern))
+    return get_branch_heads(owner, repo, None, branch_pattern)
+
+def setup_mirrors(config):
+    """Mirror-Verwaltung für das Backend "git" anhand der config.json einrichten"""
+    global MIRRORS
+    MIRRORS = MirrorStore(config.get("mirror_dir", DEFAULT_MIRROR_DIR),
+                          config.get("git_url_template", DEFAULT_GIT_URL_TEMPLATE),
+                          CLIENT.token if CLIENT.has_token() else None)
+
+def list_org_repos(org, include_archived=False):
+    """Alle Repositories einer Organisation auflisten (Seiten parallel) -> [(full_name, default_branch)]"""
+    data = get_paginated(f"/orgs/{org}/repos", params={"type": "all"}, description=f"repositories of {org}")
+    return [(r["full_name"], r.get("default_branch") or "main")
+            for r in data if include_archived or not r.get("archived")]
+
+def repo_has_file(repo_full, path, ref):
+    """Prüfen, ob eine Datei auf einem Branch existiert"""
+    r = CLIENT.get(f"/repos/{repo_full}/contents/{path}", params={"ref": ref})
+    if r.status_code in (200, 404):
+        return r.status_code == 200
+    check_response(r, f"{repo_full}: {path} prüfen")
+
+def discover_repos(org, recipe_path, include=("*",), exclude=(), concurrency=DEFAULT_CONCURRENCY):
+    """Repositories einer Organisation ermitteln, die `recipe_path` enthalten
+    -> (sortierte Liste, sortierte Liste der Repos mit fehlgeschlagener Prüfung)
+
+    Namen werden zuerst per Include-/Exclude-Glob (auf den Repo-Namen ohne
+    Organisation) gefiltert, erst danach wird parallel geprüft, ob das Recipe
+    auf dem Default-Branch liegt. Fehlschläge einzelner Prüfungen werden
+    gemeldet, das Repo übersprungen und separat zurückgegeben.
+    """
+    candidates = [(repo_full, branch) for repo_full, branch in list_org_repos(org)
+                  if any(fnmatch.fnmatch(repo_full.split("/", 1)[1], p) for p in include or ("*",))
+                  and not any(fnmatch.fnmatch(repo_full.split("/", 1)[1], p) for p in exclude)]
+
+    def probe(candidate):
+        repo_full, branch = candidate
+        try:
+            return repo_has_file(repo_full, recipe_path, branch)
+        except Exception as e:
+            locked_print(f"  {Colors.RED}❌ {repo_full}: {e}{Colors.RESET}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        probed = list(zip((repo_full for repo_full, _ in candidates), pool.map(probe, candidates)))
+    found = [repo_full for repo_full, has in probed if has]
+    failed = [repo_full for repo_full, has in probed if has is None]
+    print(f"  {Colors.GREEN}✓ {org}: {len(candidates)} Repos nach Filter, {len(found)} mit {recipe_path}{Colors.RESET}")
+    return sorted(found), sorted(failed)
+
+def discovery_key(config):
+    """Parameter, von denen die ermittelte Repo-Liste abhängt"""
+    return {"org": config["org"], "recipe_path": config["recipe_path"],
+            "include": list(config.get("include", ["*"])), "exclude": list(config.get("exclude", []))}
+
+def resolve_repos(config, refresh=False):
+    """Zu scannende Repositories bestimmen
+
+    Ohne "org" gilt die feste Liste "repos". Mit "org" wird die Organisation
+    durchsucht; das Ergebnis wird mit Zeitstempel zwischengespeichert und
+    innerhalb von "discovery_ttl_hours" wiederverwendet. Ist eine Prüfung
+    fehlgeschlagen, wird nichts gespeichert – sonst bliebe das Repo bis zum
+    Ablauf der TTL unsichtbar.
+    """
+    if not config.get("org"):
+        return config["repos"]
+    cache_path = config.get("discovery_cache", DEFAULT_DISCOVERY_CACHE)
+    ttl = float(config.get("discovery_ttl_hours", DEFAULT_DISCOVERY_TTL_HOURS)) * 3600
+    key = discovery_key(config)
+    if not refresh and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cached = json.load(f)
+        age = time.time() - cached.get("discovered", 0)
+        if cached.get("key") == key and age < ttl:
+            print(f"  {Colors.GRAY}♻️  {len(cached['repos'])} Repos aus {cache_path} "
+                  f"(vor {age / 3600:.1f} h ermittelt){Colors.RESET}")
+            return cached["repos"]
+
+    repos, failed = discover_repos(config["org"], config["recipe_path"], key["include"], key["exclude"],
+                                   int(config.get("concurrency", DEFAULT_CONCURRENCY)))
+    if failed:
+        print(f"  {Colors.YELLOW}⚠️  {len(failed)} Prüfung(en) fehlgeschlagen, "
+              f"{cache_path} wird nicht aktualisiert{Colors.RESET}")
+        return repos
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"key": key, "discovered": time.time(), "repos": repos}, f, indent=4)
+    os.replace(tmp_path, cache_path)
+    return repos
+
+def scan_state_path(state_dir, repo_full):
+    """Pfad der Zustandsdatei eines Repositories"""
+    return os.path.join(state_dir, repo_full.replace("/", "__") + ".json")
+
+def load_scan_state(state_dir, repo_full, recipe_path):
+    """Letzten Scan-Zustand eines Repositories laden -> {branch: {head, blob, bucket, version[, content]}}"""
+    path = scan_state_path(state_dir, repo_full)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Anderes Recipe -> alter Zustand ist wertlos
+    if state.get("recipe_path") != recipe_path:
+        return {}
+    return state.get("branches", {})
+
+def save_scan_state(state_dir, repo_full, recipe_path, branches):
+    """Scan-Zustand eines Repositories atomar schreiben (nicht mehr vorhandene Branches fallen weg)"""
+    os.makedirs(state_dir, exist_ok=True)
+    path = scan_state_path(state_dir, repo_full)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"recipe_path": recipe_path, "branches": branches}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+class OutputCollector:
+    """Sammelt Scan-Ergebnisse im Speicher und baut daraus die output.json-Struktur"""
+
+    def __init__(self, repos):
+        self.repos = repos
+        self.results = {}   # repo_full -> {Branch-Index: (Branch, Kategorie, Version)}
+        self.finished = set()
+
+    def record(self, repo_full, index, branch, bucket, version):
+        self.results.setdefault(repo_full, {})[index] = (branch, bucket, version)
+
+    def repo_done(self, repo_full, branch_count):
+        self.finished.add(repo_full)
+
+    def output(self):
+        """Ergebnisse in Config- und Branch-Reihenfolge zusammensetzen"""
+        output = {}
+        for repo_full in self.repos:
+            if repo_full not in self.finished:
+                continue
+            output[repo_full] = {
+                "fixed_versions": [],
+                "latest_versions": [],
+                "unknown_versions": []
+            }
+            for index in sorted(self.results.get(repo_full, {})):
+                branch, bucket, version = self.results[repo_full][index]
+                output[repo_full][bucket].append((branch, version))
+        return output
+
+def scan_repositories(repos, recipe_path, branch_pattern, concurrency=DEFAULT_CONCURRENCY, backend="rest",
+                      state_dir=None, sink=None, skip=None):
+    """Repositories parallel scannen und jedes Branch-Ergebnis an `sink` melden.
+
+    Branch-Listen und Recipe-Abfragen laufen über einen gemeinsamen Thread-Pool
+    mit höchstens `concurrency` gleichzeitigen Anfragen. Es sind höchstens
+    `concurrency` Repos gleichzeitig in Arbeit; erst wenn eines fertig ist,
+    wird die Branch-Liste des nächsten geholt, damit Zwischenstände und
+    wartende Aufgaben nicht mit der Flottengröße wachsen. Jedes Ergebnis trägt
+    seinen Branch-Index, damit output.json unabhängig von der Abschluss-
+    reihenfolge deterministisch sortiert werden kann. `backend` wählt zwischen
+    einem REST-Aufruf pro Branch und GraphQL-Blöcken ("graphql").
+
+    Mit `state_dir` wird inkrementell gescannt: Branches, deren Head-Commit
+    sich seit dem letzten Lauf nicht bewegt hat, übernehmen das gespeicherte
+    Ergebnis; nur neue oder geänderte Branches werden abgerufen.
+
+    `sink` braucht record(repo, index, branch, bucket, version) und
+    repo_done(repo, anzahl); ohne Angabe wird ein OutputCollector verwendet.
+    `skip` ({repo: True | {branches}}) überspringt bei einer Wiederaufnahme
+    bereits protokollierte Repos bzw. Branches. Schlägt eine Abfrage fehl,
+    bekommt das Repo kein repo_done; ein fortgesetzter Scan holt die
+    fehlenden Branches nach. Rückgabe ist der Sink.
+    """
+    sink = sink if sink is not None else OutputCollector(repos)
+    skip = skip or {}
+    branch_lists = {}  # repo_full -> passende Branches
+    states = {}        # repo_full -> neuer Scan-Zustand {branch: {...}}
+    heads = {}         # repo_full -> {branch: Head-SHA}
+    messages = {}      # repo_full -> gepufferte Ausgabezeilen
+    pending = {}       # repo_full -> Anzahl offener Recipe-Abfragen (Aufgaben)
+    failed = set()     # Repos mit mindestens einer fehlgeschlagenen Abfrage -> nicht als fertig markieren
+    active = set()     # Repos mit laufender Branch-Liste oder offenen Recipe-Abfragen
+    group_size = {"graphql": GRAPHQL_CHUNK_SIZE, "git": None}.get(backend, 1)
+    window = max(1, concurrency)
+    queue = iter(dict.fromkeys(repos))
+    futures = {}
+
+    def finish_repo(repo_full, completed=False):
+        # Zwischenstände des Repos freigeben, damit der Speicher flach bleibt
+        active.discard(repo_full)
+        if completed:
+            sink.repo_done(repo_full, len(branch_lists[repo_full]))
+        branch_lists.pop(repo_full, None)
+        heads.pop(repo_full, None)
+        if state_dir and repo_full in states:
+            save_scan_state(state_dir, repo_full, recipe_path, states[repo_full])
+        states.pop(repo_full, None)
+        locked_print(f"\n{Colors.BOLD}🔄 Prüfe {repo_full}...{Colors.RESET}", *messages.pop(repo_full))
+
+    def start_repos():
+        # Freie Plätze mit den nächsten Repos füllen (Branch-Liste anfordern)
+        while len(active) < window:
+            repo_full = next(queue, None)
+            if repo_full is None:
+                return
+            if skip.get(repo_full) is True:
+                continue
+            messages[repo_full] = []
+            try:
+                owner, repo = repo_full.split("/")
+            except ValueError as e:
+                messages[repo_full].append(f"    {Colors.RED}❌ Fehler bei {repo_full}: {e}{Colors.RESET}")
+                finish_repo(repo_full)
+                continue
+            active.add(repo_full)
+            futures[pool.submit(list_branch_heads, owner, repo, branch_pattern, backend)] = (repo_full, None)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        start_repos()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                repo_full, indices = futures.pop(future)
+                owner, repo = repo_full.split("/")
+
+                if indices is None:
+                    # Branch-Liste ist da -> Recipe-Abfragen einplanen
+                    try:
+                        branch_heads = future.result()
+                    except Exception as e:
+                        messages[repo_full].append(f"    {Colors.RED}❌ Fehler bei {repo_full}: {e}{Colors.RESET}")
+                        finish_repo(repo_full)
+                        continue
+                    matching = [(b, sha) for b, sha in branch_heads if fnmatch.fnmatch(b, branch_pattern)]
+                    matching_branches = [b for b, _ in matching]
+                    messages[repo_full].append(f"  {Colors.GREEN}✓ Gefundene Branches: {len(matching_branches)}{Colors.RESET}")
+                    branch_lists[repo_full] = matching_branches
+                    heads[repo_full] = dict(matching)
+                    states[repo_full] = {}
+
+                    # Unveränderte Branches aus dem letzten Zustand übernehmen
+                    previous = load_scan_state(state_dir, repo_full, recipe_path) if state_dir else {}
+                    already_logged = skip.get(repo_full) or set()
+                    to_fetch = []
+                    for index, (branch, head) in enumerate(matching):
+                        entry = previous.get(branch)
+                        if entry and entry.get("head") == head:
+                            states[repo_full][branch] = entry
+                            if branch not in already_logged:
+                                sink.record(repo_full, index, branch, entry["bucket"], entry["version"])
+                        elif branch not in already_logged:
+                            to_fetch.append(index)
+                    if state_dir:
+                        messages[repo_full].append(
+                            f"  {Colors.GRAY}♻️  {len(matching) - len(to_fetch)} unverändert, "
+                            f"{len(to_fetch)} neu abzurufen{Colors.RESET}")
+
+                    pending[repo_full] = 0
+                    size = group_size or max(1, len(to_fetch))
+                    for start in range(0, len(to_fetch), size):
+                        group = to_fetch[start:start + size]
+                        group_branches = [matching_branches[i] for i in group]
+                        future = pool.submit(scan_branches, owner, repo, recipe_path, group_branches, backend)
+                        futures[future] = (repo_full, group)
+                        pending[repo_full] += 1
+                else:
+                    group_branches = [branch_lists[repo_full][i] for i in indices]
+                    try:
+                        for index, branch, (bucket, version, line, blob, content) in zip(indices, group_branches, future.result()):
+                            sink.record(repo_full, index, branch, bucket, version)
+                            states[repo_full][branch] = {"head": heads[repo_full][branch], "blob": blob,
+                                                         "bucket": bucket, "version": version}
+                            # Inhalt für spätere Updates merken (nur Update-Kandidaten)
+                            if bucket == "latest_versions":
+                                states[repo_full][branch]["content"] = content
+                            messages[repo_full].append(line)
+                    except Exception as e:
+                        messages[repo_full].append(f"    {Colors.RED}❌ Fehler bei {repo_full} ({', '.join(group_branches)}): {e}{Colors.RESET}")
+                        failed.add(repo_full)
+                    pending[repo_full] -= 1
+
+                if pending.get(repo_full) == 0:
+                    del pending[repo_full]
+                    finish_repo(repo_full, completed=repo_full not in failed)
+            start_repos()
+    except BaseException:
+        # Abbruch (z.B. Strg+C): wartende Abfragen verwerfen statt den Scan zu Ende zu führen
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return sink
+
+def setup_client(config):
+    """Gemeinsamen Client anhand der config.json einstellen (API-Basis, Parallelität, Tempo, Cache)"""
+    global STREAM_RECIPES
+    STREAM_RECIPES = bool(config.get("stream_recipes", True))
+    CLIENT.set_base_url(os.environ.get("GITHUB_API_URL") or config.get("api_url") or DEFAULT_API_URL,
+                        os.environ.get("GITHUB_GRAPHQL_URL") or config.get("graphql_url"))
+    CLIENT.configure_rate(max_rate=config.get("max_requests_per_second"))
+    apply_configured_tokens(config)
+    CLIENT.configure_pool(config.get("concurrency", DEFAULT_CONCURRENCY))
+    cache_path = config.get("http_cache", DEFAULT_HTTP_CACHE)
+    if cache_path and (CLIENT.cache is None or CLIENT.cache.path != cache_path):
+        max_bytes = int(config.get("http_cache_max_mb", 100)) * 1024 * 1024
+        CLIENT.cache = HttpCache(cache_path, max_bytes)
+    elif not cache_path:
+        CLIENT.cache = None
+
+def configured_tokens(config):
+    """Tokens aus GITHUB_TOKENS und "token_file" sammeln -> Liste (leer = Token aus Skript/Menü behalten)"""
+    token_file = config.get("token_file")
+    try:
+        return load_tokens(token_file, GITHUB_TOKENS)
+    except OSError as e:
+        print(f"{Colors.RED}❌ Token-Datei {token_file} nicht lesbar: {e}{Colors.RESET}")
+        return load_tokens(None, GITHUB_TOKENS)
+
+def apply_configured_tokens(config):
+    """Tokens aus GITHUB_TOKENS bzw. "token_file" übernehmen, sofern welche angegeben sind"""
+    tokens = configured_tokens(config)
+    if tokens:
+        CLIENT.set_tokens(tokens)
+
+def print_cache_stats():
+    """Treffer und Fehlschläge des ETag-Caches ausgeben"""
+    if CLIENT.cache is None:
+        return
+    stats = CLIENT.cache.stats()
+    total = stats["hits"] + stats["misses"]
+    rate = f"{100 * stats['hits'] / total:.0f}%" if total else "–"
+    print(f"{Colors.GRAY}🗄️  HTTP-Cache: {stats['hits']} Treffer (304), {stats['misses']} Fehlschläge, "
+          f"Trefferquote {rate}{Colors.RESET}")
+
+def print_request_stats(config, label):
+    """Messwerte pro Endpunkt als Tabelle ausgeben und optional als JSON/Prometheus-Datei schreiben
+
+    config.json: "metrics_json" (Pfad) und "metrics_prometheus" (Pfad für den
+    Textfile-Collector), jeweils nur wenn gesetzt.
+    """
+    snapshot = CLIENT.metrics.snapshot()
+    if not snapshot["endpoints"]:
+        return
+    print(f"\n{Colors.BOLD}⏱️  Anfragen pro Endpunkt ({label}, {snapshot['elapsed_seconds']:.1f}s):{Colors.RESET}")
+    print(f"{Colors.GRAY}  {'Endpunkt':<48} {'Anz.':>6} {'Ø ms':>7} {'p95 ms':>7} {'max ms':>7} "
+          f"{'Wdh.':>5} {'Cache':>6} {'KiB':>8} {'Drossel s':>9}{Colors.RESET}")
+    for endpoint, stats in snapshot["endpoints"].items():
+        average = 1000 * stats["latency_seconds_sum"] / stats["calls"] if stats["calls"] else 0
+        print(f"  {endpoint:<48} {stats['calls']:>6} {average:>7.0f} {1000 * stats['latency_p95']:>7.0f} "
+              f"{1000 * stats['latency_seconds_max']:>7.0f} {stats['retries']:>5} {stats['cache_hits']:>6} "
+              f"{stats['bytes_received'] / 1024:>8.1f} {stats['throttled_seconds']:>9.2f}")
+    totals = CLIENT.metrics.totals()
+    rate = totals["calls"] / totals["elapsed_seconds"] if totals["elapsed_seconds"] else 0
+    print(f"{Colors.GRAY}  Gesamt: {totals['calls']} Anfragen ({rate:.1f}/s), {totals['errors']} Fehler, "
+          f"{totals['retries']} Wiederholungen, {totals['bytes_received'] / 1024:.1f} KiB empfangen, "
+          f"{totals['bytes_cached'] / 1024:.1f} KiB aus dem Cache, "
+          f"{totals['throttled_seconds']:.1f}s gedrosselt{Colors.RESET}")
+    
+    if config.get("metrics_json"):
+        CLIENT.metrics.write_json(config["metrics_json"], {"action": label, "finished": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        print(f"{Colors.GRAY}  Messwerte gespeichert in: {config['metrics_json']}{Colors.RESET}")
+    if config.get("metrics_prometheus"):
+        CLIENT.metrics.write_prometheus(config["metrics_prometheus"])
+        print(f"{Colors.GRAY}  Prometheus-Datei geschrieben: {config['metrics_prometheus']}{Colors.RESET}")
+
+def print_pool_stats():
+    """Wiederverwendung der HTTP-Verbindungen pro Host ausgeben"""
+    for host, stats in CLIENT.pool_stats().items():
+        print(f"{Colors.GRAY}🔌 {host}: {stats['requests']} Anfragen über {stats['connections']} Verbindungen "
+              f"({stats['reused']} Handshakes eingespart){Colors.RESET}")
+    tokens = CLIENT.tokens.stats()
+    if len(tokens) > 1:
+        for entry in tokens:
+            remaining = "?" if entry["remaining"] is None else f"{entry['remaining']}/{entry['limit'] or '?'}"
+            parked = f", geparkt {entry['parked_seconds']:.0f}s" if entry["parked_seconds"] else ""
+            print(f"{Colors.GRAY}🔑 Token {entry['token']}: {entry['requests']} Anfragen, "
+                  f"Rest {remaining}{parked}{Colors.RESET}")
+
+def open_results_store(config):
+    """Ergebnis-Datenbank öffnen -> ResultsStore oder None, wenn abgeschaltet"""
+    path = config.get("results_db", DEFAULT_RESULTS_DB)
+    return ResultsStore(path) if path else None
+
+def load_results(config):
+    """Ergebnisse des letzten Scans im output.json-Format laden -> dict oder None
+
+    Bevorzugt wird der letzte Lauf aus der Ergebnis-Datenbank; ohne Datenbank
+    (oder vor dem ersten gespeicherten Lauf) wird output.json gelesen.
+    """
+    store = open_results_store(config)
+    if store:
+        try:
+            run = store.latest_run()
+            if run:
+                return store.output(run[0])
+        finally:
+            store.close()
+    if not os.path.exists("output.json"):
+        return None
+    with open("output.json") as f:
+        return json.load(f)
+
+def load_update_candidates(config):
+    """Update-Kandidaten des letzten Scans im output.json-Format laden -> dict oder None
+
+    Aus der Ergebnis-Datenbank wird nur die Kategorie latest_versions gelesen
+    (je Repo eine Liste, auch leer); ohne Datenbank wie load_results().
+    """
+    store = open_results_store(config)
+    if store:
+        try:
+            run = store.latest_run()
+            if run:
+                output = {repo_full: {"latest_versions": []} for repo_full in store.repos(run[0])}
+                for repo_full, branch, version in store.by_bucket(run[0], "latest_versions"):
+                    output[repo_full]["latest_versions"].append([branch, version])
+                return {"recipe_path": run[3], "output": output}
+        finally:
+            store.close()
+    return load_results({"results_db": None})
+
+def run_scan(config, repos, log, resume=False, output_path="output.json"):
+    """Scan ohne Rückfragen ausführen: Protokoll, output.json und Ergebnis-Datenbank -> Zusammenfassung
+
+    Gemeinsamer Kern von Option A und `cli.py scan`. Die Zusammenfassung
+    enthält die Anzahl Branches pro Kategorie und die Repos, deren Scan
+    fehlgeschlagen ist (nicht als vollständig protokolliert). Gibt es solche,
+    bleibt das Protokoll ohne Abschlussmarke und ist fortsetzbar.
+    """
+    recipe_path = config["recipe_path"]
+    branch_pattern = config["branch_pattern"]
+    concurrency = int(config.get("concurrency", DEFAULT_CONCURRENCY))
+    backend = config.get("fetch_backend", "rest")
+    state_dir = config.get("scan_state_dir", DEFAULT_SCAN_STATE_DIR) if config.get("incremental", True) else None
+    if backend == "git":
+        setup_mirrors(config)
+    
+    skip = log.progress() if resume else None
+    log.start(recipe_path, branch_pattern, resume)
+    try:
+        scan_repositories(repos, recipe_path, branch_pattern, concurrency, backend,
+                          state_dir, sink=log, skip=skip)
+    except BaseException as e:
+        log.close()
+        if isinstance(e, KeyboardInterrupt):
+            print(f"\n{Colors.YELLOW}⚠️  Scan unterbrochen – Fortschritt in {log.path} gesichert, "
+                  f"beim nächsten Start fortsetzbar.{Colors.RESET}")
+        raise
+    progress = log.progress()
+    failed_repos = [repo_full for repo_full in dict.fromkeys(repos) if progress.get(repo_full) is not True]
+    if failed_repos:
+        log.close()
+    else:
+        log.finish()
+    
+    # Ergebnisse aus dem Protokoll in output.json schreiben (dabei zählen)
+    counts = {key: 0 for key in BUCKET_KEYS}
+    
+    def counted(repo_results):
+        for repo_full, data in repo_results:
+            for key in BUCKET_KEYS:
+                counts[key] += len(data[key])
+            yield repo_full, data
+    
+    write_output(output_path, recipe_path, counted(log.repo_results(repos)))
+    run_id = None
+    store = open_results_store(config)
+    if store:
+        header, _ = log.read_header()
+        run_id = store.import_run(recipe_path, branch_pattern, log.repo_results(repos),
+                                  started=header.get("started"))
+        store.close()
+    return {
+        "run_id": run_id,
+        "results_db": store.path if store else None,
+        "output": output_path,
+        "repos": len(repos),
+        "failed_repos": failed_repos,
+        "branches": sum(counts.values()),
+        **counts,
+    }
+
 def check_constructionkit_versions():
     """ConstructionKit Versionen in allen konfigurierten Repositories prüfen"""
     print(f"\n{Colors.BOLD}{Colors.GREEN}🔍 CONSTRUCTIONKIT VERSIONEN PRÜFEN{Colors.RESET}")
     print(f"{Colors.BLUE}{'─'*50}{Colors.RESET}")
     
-    if not GITHUB_TOKEN or GITHUB_TOKEN == "...":
+    # Tokens aus Umgebung/Token-Datei zählen schon für die Prüfung
+    try:
+        apply_configured_tokens(load_config())
+    except ValueError:
+        pass
+    if not CLIENT.has_token():
         print(f"{Colors.RED}❌ GitHub Token nicht konfiguriert!{Colors.RESET}")
         print(f"{Colors.YELLOW}Bitte erst Token in Option E konfigurieren.{Colors.RESET}")
         input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
@@ -157,67 +914,39 @@ def check_constructionkit_versions():
         
         recipe_path = config["recipe_path"]
         branch_pattern = config["branch_pattern"]
+        concurrency = int(config.get("concurrency", DEFAULT_CONCURRENCY))
+        setup_client(config)
+        CLIENT.metrics.reset()
+        repos = resolve_repos(config)
         
         print(f"{Colors.YELLOW}📋 Konfiguration:{Colors.RESET}")
         print(f"  Recipe Path: {Colors.CYAN}{recipe_path}{Colors.RESET}")
         print(f"  Branch Pattern: {Colors.CYAN}{branch_pattern}{Colors.RESET}")
-        print(f"  Repositories: {Colors.CYAN}{len(config['repos'])}{Colors.RESET}")
+        if config.get("org"):
+            print(f"  Organisation: {Colors.CYAN}{config['org']}{Colors.RESET}")
+        print(f"  Repositories: {Colors.CYAN}{len(repos)}{Colors.RESET}")
+        print(f"  Parallele Anfragen: {Colors.CYAN}{concurrency}{Colors.RESET}")
+        print(f"  Backend: {Colors.CYAN}{config.get('fetch_backend', 'rest')}{Colors.RESET}")
         
-        output = {"recipe_path": recipe_path, "output": {}}
+        # Unterbrochenen Scan fortsetzen?
+        log = ScanLog(config.get("scan_log", DEFAULT_SCAN_LOG))
+        resume = False
+        if log.resumable(recipe_path, branch_pattern):
+            answer = input(f"\n{Colors.YELLOW}Unterbrochener Scan gefunden ({log.path}). Fortsetzen? [J/n]: {Colors.RESET}")
+            resume = answer.strip().lower() in ("", "j", "ja", "y", "yes")
         
-        for repo_full in config["repos"]:
-            print(f"\n{Colors.BOLD}🔄 Prüfe {repo_full}...{Colors.RESET}")
-            owner, repo = repo_full.split("/")
-            
-            try:
-                branches = get_branches(owner, repo)
-                matching_branches = [b for b in branches if fnmatch.fnmatch(b, branch_pattern)]
-                
-                print(f"  {Colors.GREEN}✓ Gefundene Branches: {len(matching_branches)}{Colors.RESET}")
-                
-                output['output'][repo_full] = {
-                    "fixed_versions": [],
-                    "latest_versions": [],
-                    "unknown_versions": []
-                }
-                
-                for branch in matching_branches:
-                    content, sha = get_file_content(owner, repo, recipe_path, branch)
-                    if not content:
-                        print(f"    {Colors.RED}❌ {branch}: Datei nicht gefunden{Colors.RESET}")
-                        output['output'][repo_full]["unknown_versions"].append((branch, ''))
-                        continue
-                    
-                    current_version = find_constructionkit_version(content)
-                    if current_version:
-                        print(f"    {Colors.GREEN}✓ {branch}: {current_version}{Colors.RESET}")
-                        
-                        # Fixed versions prüfen
-                        if re.findall(r"^.*\[(\d+\.\d+\.\d+|>\d+\.\d+\.\d+\s*<\d+\.\d+\.\d+|\d+\.\d+\.\d+\s*\|\|\s*>\d+\.\d+\.\d+\s*<\d+\.\d+\.\d+)].*$", current_version) or \
-                           re.findall(r"^.*/\d+\.\d+\.\d+@.*$", current_version):
-                            output['output'][repo_full]["fixed_versions"].append((branch, current_version))
-                        # Latest versions prüfen
-                        elif re.findall(r"^.*\[>=\d+\.\d+\.\d+].*$", current_version):
-                            output['output'][repo_full]["latest_versions"].append((branch, current_version))
-                        else:
-                            output['output'][repo_full]["unknown_versions"].append((branch, current_version))
-                    else:
-                        print(f"    {Colors.YELLOW}⚠️  {branch}: Keine ConstructionKit Version gefunden{Colors.RESET}")
-                        output['output'][repo_full]["unknown_versions"].append((branch, ''))
-                    
-                    time.sleep(0.5)  # Rate limiting
-                
-            except Exception as e:
-                print(f"    {Colors.RED}❌ Fehler bei {repo_full}: {e}{Colors.RESET}")
-            
-            time.sleep(0.5)  # Rate limiting
-        
-        # Ergebnisse speichern
-        with open("output.json", "w") as f:
-            json.dump(output, f, indent=4)
+        summary = run_scan(config, repos, log, resume)
         
         print(f"\n{Colors.GREEN}✅ Prüfung abgeschlossen!{Colors.RESET}")
         print(f"{Colors.CYAN}Ergebnisse in output.json gespeichert.{Colors.RESET}")
+        if summary["run_id"]:
+            print(f"{Colors.CYAN}Lauf #{summary['run_id']} in {summary['results_db']} gespeichert.{Colors.RESET}")
+        if summary["failed_repos"]:
+            print(f"{Colors.YELLOW}⚠️  {len(summary['failed_repos'])} Repos unvollständig "
+                  f"({', '.join(summary['failed_repos'])}) – beim nächsten Scan fortsetzbar.{Colors.RESET}")
+        print_pool_stats()
+        print_cache_stats()
+        print_request_stats(config, "scan")
         
     except Exception as e:
         print(f"{Colors.RED}❌ Fehler: {e}{Colors.RESET}")
@@ -270,13 +999,27 @@ def create_edit_config():
     print(f"[2] Aktuelle Konfiguration beibehalten")
     print(f"[3] Nur Test-Repositories (ZCU_CL, ZCU_CR)")
     print(f"[4] Eigene Repositories eingeben")
+    print(f"[5] Alle Repositories einer Organisation mit Recipe ermitteln")
     
     choice = input(f"Auswahl [3]: ").strip()
     
+    discovery = None
     if choice == "1":
         repos = default_repos
-    elif choice == "2" and config.get("repos"):
-        repos = config["repos"]
+    elif choice == "2" and (config.get("repos") or config.get("org")):
+        repos = config.get("repos", [])
+        if config.get("org"):
+            discovery = {key: config[key] for key in ("org", "include", "exclude") if key in config}
+    elif choice == "5":
+        repos = config.get("repos", [])
+        org = input(f"Organisation [{Colors.CYAN}{config.get('org', 'spx01')}{Colors.RESET}]: ").strip() or config.get("org", "spx01")
+        current_include = ",".join(config.get("include", ["*"]))
+        include = input(f"Include-Globs, kommagetrennt [{Colors.CYAN}{current_include}{Colors.RESET}]: ").strip() or current_include
+        current_exclude = ",".join(config.get("exclude", []))
+        exclude = input(f"Exclude-Globs, kommagetrennt [{Colors.CYAN}{current_exclude}{Colors.RESET}]: ").strip() or current_exclude
+        discovery = {"org": org,
+                     "include": [p.strip() for p in include.split(",") if p.strip()] or ["*"],
+                     "exclude": [p.strip() for p in exclude.split(",") if p.strip()]}
     elif choice == "4":
         repos = []
         print(f"\n{Colors.YELLOW}Repositories eingeben (leer für Ende):{Colors.RESET}")
@@ -292,12 +1035,38 @@ def create_edit_config():
             "spx01/STLA.BSW.ZCU_CR"
         ]
     
-    # Konfiguration zusammenstellen
-    new_config = {
+    # API-Basis (z.B. lokaler Mock-Server für Lasttests)
+    current_api_url = config.get("api_url", DEFAULT_API_URL)
+    api_url = input(f"API-URL [{Colors.CYAN}{current_api_url}{Colors.RESET}]: ").strip() or current_api_url
+    
+    # Parallele Anfragen
+    current_concurrency = config.get("concurrency", DEFAULT_CONCURRENCY)
+    concurrency = input(f"Parallele Anfragen [{Colors.CYAN}{current_concurrency}{Colors.RESET}]: ").strip()
+    concurrency = int(concurrency) if concurrency.isdigit() and int(concurrency) > 0 else current_concurrency
+    
+    # Konfiguration zusammenstellen (weitere vorhandene Schlüssel bleiben erhalten)
+    new_config = dict(config)
+    new_config.update({
         "recipe_path": recipe_path,
         "branch_pattern": branch_pattern,
-        "repos": repos
-    }
+        "repos": repos,
+        "concurrency": concurrency
+    })
+    if api_url != DEFAULT_API_URL or "api_url" in config:
+        new_config["api_url"] = api_url
+    for key in ("org", "include", "exclude"):
+        new_config.pop(key, None)
+    if discovery:
+        new_config.update(discovery)
+        # Gleich ermitteln, damit die Liste geprüft werden kann; sonst beim nächsten Scan
+        if CLIENT.has_token():
+            try:
+                setup_client(new_config)
+                repos = new_config["repos"] = resolve_repos(new_config, refresh=choice == "5")
+            except Exception as e:
+                print(f"{Colors.RED}❌ Ermittlung fehlgeschlagen: {e}{Colors.RESET}")
+        else:
+            print(f"{Colors.YELLOW}⚠️  Kein Token – Repositories werden beim nächsten Scan ermittelt.{Colors.RESET}")
     
     # Speichern
     try:
@@ -313,20 +1082,252 @@ def create_edit_config():
     
     input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
 
+PR_BRANCH_PREFIX = "update-ckit-version-"
+
+# Geplante Aktionen pro Branch und die dafür nötigen Schreibzugriffe
+PLAN_ACTIONS = {
+    "create": ("Branch + PR anlegen", 4),          # Tree, Commit, Ref, PR
+    "update_pr": ("offenen PR aktualisieren", 4),  # Tree, Commit, Ref weitersetzen, PR-Titel
+    "reopen": ("vorhandenen Branch nutzen, PR anlegen", 4),
+    "skip": ("PR bereits offen", 0),
+}
+
+def update_message(new_version):
+    return f"Update constructionkit to {new_version}"
+
+def update_body(new_version):
+    return f"This PR updates constructionkit to version {new_version}."
+
+def load_update_targets(owner, repo):
+    """Vorhandene Update-Branches und offene PRs eines Repos in einem Rutsch laden
+
+    -> ({PR-Branch: Head-SHA}, {PR-Branch: {"url", "title", "number"}}); Branches per
+    git/matching-refs, PRs über die paginierte Liste offener Pull Requests.
+    """
+    refs = get_paginated(f"/repos/{owner}/{repo}/git/matching-refs/heads/{PR_BRANCH_PREFIX}",
+                         description=f"update branches for {owner}/{repo}")
+    pulls = get_paginated(f"/repos/{owner}/{repo}/pulls", params={"state": "open"},
+                          description=f"pull requests for {owner}/{repo}")
+    branches = {ref["ref"][len("refs/heads/"):]: ref["object"]["sha"] for ref in refs}
+    prs = {pr["head"]["ref"]: {"url": pr["html_url"], "title": pr["title"], "number": pr["number"]}
+           for pr in pulls if pr["head"]["ref"].startswith(PR_BRANCH_PREFIX)}
+    return branches, prs
+
+def plan_update(results, new_version, concurrency=DEFAULT_CONCURRENCY):
+    """Nötige Schreibzugriffe für alle Latest-Version-Branches bestimmen -> Liste von Plan-Einträgen
+
+    Pro Repo werden einmal die vorhandenen Update-Branches und offenen PRs
+    geladen. Daraus ergibt sich je Branch eine Aktion aus PLAN_ACTIONS:
+    ein offener PR mit demselben Titel (= derselben Version) wird
+    übersprungen, ein offener PR mit älterer Version weitergesetzt und
+    umbenannt, damit ein erneuter Rollout derselben Version ihn überspringt.
+    """
+    candidates = [(repo_full, info["latest_versions"]) for repo_full, info in results["output"].items()
+                  if info["latest_versions"]]
+
+    def plan_repo(candidate):
+        repo_full, branches = candidate
+        owner, repo = repo_full.split("/")
+        try:
+            refs, prs = load_update_targets(owner, repo)
+        except Exception as e:
+            return [{"repo": repo_full, "branch": branch, "current": current, "action": "create",
+                     "pr_branch": PR_BRANCH_PREFIX + branch, "pr_head": None, "pr_url": None,
+                     "pr_number": None, "note": f"Vorabprüfung fehlgeschlagen: {e}"} for branch, current in branches]
+        entries = []
+        for branch, current in branches:
+            pr_branch = PR_BRANCH_PREFIX + branch
+            pr = prs.get(pr_branch)
+            if pr and pr["title"] == update_message(new_version):
+                action = "skip"
+            elif pr:
+                action = "update_pr"
+            elif pr_branch in refs:
+                action = "reopen"
+            else:
+                action = "create"
+            entries.append({"repo": repo_full, "branch": branch, "current": current, "action": action,
+                            "pr_branch": pr_branch, "pr_head": refs.get(pr_branch),
+                            "pr_url": pr["url"] if pr else None, "pr_number": pr["number"] if pr else None})
+        return entries
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        return [entry for entries in pool.map(plan_repo, candidates) for entry in entries]
+
+def print_plan(plan):
+    """Plan zusammengefasst ausgeben -> Anzahl der geplanten Schreibzugriffe"""
+    counts = {}
+    for entry in plan:
+        counts[entry["action"]] = counts.get(entry["action"], 0) + 1
+    writes = sum(PLAN_ACTIONS[action][1] * count for action, count in counts.items())
+    print(f"\n{Colors.BOLD}📝 Plan für {len(plan)} Branches in {len({e['repo'] for e in plan})} Repositories:{Colors.RESET}")
+    for action, (label, _) in PLAN_ACTIONS.items():
+        if counts.get(action):
+            print(f"  {label:<40} {Colors.CYAN}{counts[action]:>6}{Colors.RESET}")
+    for entry in plan:
+        if entry["action"] in ("update_pr", "reopen") or entry.get("note"):
+            print(f"  {Colors.GRAY}{entry['repo']} {entry['branch']}: {PLAN_ACTIONS[entry['action']][0]}"
+                  f"{' – ' + entry['note'] if entry.get('note') else ''}{Colors.RESET}")
+    print(f"  {Colors.YELLOW}≈ {writes} Schreibzugriffe{Colors.RESET}")
+    return writes
+
+def update_branch(owner, repo, recipe_paths, branch, new_version, cached=None, plan=None):
+    """Update für einen Branch ausführen: alle Recipes in einem Commit ändern, PR erstellen
+
+    `cached` ist der Scan-Zustand des Branches (head, content); solange der Head
+    sich nicht bewegt hat, wird der Recipe-Inhalt daraus übernommen statt neu
+    geladen. `plan` ist der Plan-Eintrag aus plan_update(); ohne Plan wird
+    angenommen, dass weder Update-Branch noch PR existieren. Vorhandene
+    Update-Branches werden weitergesetzt statt neu angelegt. Fehler werden
+    nicht geworfen, sondern mit dem fehlgeschlagenen Schritt im Ergebnis vermerkt.
+    """
+    pr_branch = PR_BRANCH_PREFIX + branch
+    message = update_message(new_version)
+    action = plan["action"] if plan else "create"
+    result = {"repo": f"{owner}/{repo}", "branch": branch, "pr_branch": pr_branch,
+              "status": "failed", "step": None, "pr_url": None, "error": None}
+    if action == "skip":
+        result.update(status="skipped", pr_url=plan["pr_url"])
+        return result
+    step = "read_base"
+    try:
+        # Bei vorhandenem Update-Branch auf dessen Stand aufsetzen
+        existing = action in ("update_pr", "reopen")
+        head = plan["pr_head"] if existing else get_branch_sha(owner, repo, branch)
+
+        step = "read_recipes"
+        files = {}
+        for i, path in enumerate(recipe_paths):
+            if i == 0 and not existing and cached and cached.get("content") and cached.get("head") == head:
+                content = cached["content"]
+            else:
+                content, _ = get_file_content(owner, repo, path, head)
+            if content is None or not find_constructionkit_version(content):
+                if i == 0:
+                    raise GitHubAPIError(f"{path}: keine ConstructionKit-Referenz gefunden")
+                continue
+            new_content = update_version_in_content(content, new_version)
+            if new_content != content:
+                files[path] = new_content
+
+        if files:
+            step = "commit"
+            commit_files(owner, repo, head, pr_branch, files, message, existing=existing)
+        elif not existing:
+            result.update(status="unchanged")
+            return result
+
+        if action == "update_pr":
+            # Titel trägt die Version – sonst plant jeder weitere Rollout den PR erneut ein
+            step = "update_pull_request"
+            update_pull_request(owner, repo, plan["pr_number"], message, update_body(new_version))
+            result.update(status="updated", step=None, pr_url=plan["pr_url"], files=sorted(files))
+            return result
+
+        step = "create_pull_request"
+        result["pr_url"] = create_pull_request(owner, repo, pr_branch, branch, message, update_body(new_version))
+        result.update(status="created", step=None, files=sorted(files))
+    except Exception as e:
+        result.update(step=step, error=str(e))
+    return result
+
+def run_update(results, new_version, concurrency=DEFAULT_CONCURRENCY, state_dir=None, extra_recipe_paths=(),
+               plan=None):
+    """Alle Latest-Version-Branches aus output.json parallel aktualisieren -> Update-Report
+
+    Die Ketten der einzelnen Branches laufen über Repos hinweg gleichzeitig
+    (höchstens `concurrency`), Fehler bleiben auf ihren Branch beschränkt.
+    Der Report listet die Ergebnisse in output.json-Reihenfolge.
+    `extra_recipe_paths` sind weitere Dateien mit ConstructionKit-Referenz,
+    die im selben Commit mitgeändert werden. Mit `plan` (aus plan_update)
+    werden nur die dort geplanten Schreibzugriffe ausgeführt.
+    """
+    recipe_path = results["recipe_path"]
+    recipe_paths = [recipe_path] + [p for p in extra_recipe_paths if p != recipe_path]
+    planned = {(e["repo"], e["branch"]): e for e in plan or ()}
+    jobs = []
+    for repo_full, branches_info in results["output"].items():
+        if not branches_info["latest_versions"]:
+            print(f"{Colors.GRAY}⏭️  {repo_full}: Keine Latest-Versions gefunden{Colors.RESET}")
+            continue
+        state = load_scan_state(state_dir, repo_full, recipe_path) if state_dir else {}
+        owner, repo = repo_full.split("/")
+        for branch, current_version in branches_info["latest_versions"]:
+            jobs.append((owner, repo, branch, current_version, state.get(branch), planned.get((repo_full, branch))))
+
+    def run_job(job):
+        owner, repo, branch, current_version, cached, entry = job
+        result = update_branch(owner, repo, recipe_paths, branch, new_version, cached, entry)
+        if result["status"] == "created":
+            locked_print(f"  {Colors.GREEN}✅ {owner}/{repo} {branch}: {current_version} → {new_version} "
+                         f"({result['pr_url']}){Colors.RESET}")
+        elif result["status"] == "updated":
+            locked_print(f"  {Colors.GREEN}🔁 {owner}/{repo} {branch}: offener PR auf {new_version} gebracht "
+                         f"({result['pr_url']}){Colors.RESET}")
+        elif result["status"] == "skipped":
+            locked_print(f"  {Colors.GRAY}⏭️  {owner}/{repo} {branch}: PR bereits offen ({result['pr_url']}){Colors.RESET}")
+        elif result["status"] == "unchanged":
+            locked_print(f"  {Colors.GRAY}⏭️  {owner}/{repo} {branch}: bereits auf {new_version}{Colors.RESET}")
+        else:
+            locked_print(f"  {Colors.RED}❌ {owner}/{repo} {branch}: {result['step']} – {result['error']}{Colors.RESET}")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        branch_results = list(pool.map(run_job, jobs))
+
+    return {
+        "version": new_version,
+        "recipe_path": recipe_path,
+        "created": sum(1 for r in branch_results if r["status"] == "created"),
+        "updated": sum(1 for r in branch_results if r["status"] == "updated"),
+        "skipped": sum(1 for r in branch_results if r["status"] == "skipped"),
+        "failed": sum(1 for r in branch_results if r["status"] == "failed"),
+        "results": branch_results,
+    }
+
+def load_config(config_file="config.json"):
+    """config.json laden; fehlt sie, gelten die Standardwerte"""
+    if not os.path.exists(config_file):
+        return {}
+    with open(config_file) as f:
+        return json.load(f)
+
+def save_update_report(config, report):
+    """update_report.json, created_prs.txt und die PR-Tabelle der Datenbank schreiben -> neue PR-URLs"""
+    with open("update_report.json", "w") as f:
+        json.dump(report, f, indent=4)
+    
+    list_of_prs = [r["pr_url"] for r in report["results"] if r["status"] == "created"]
+    store = open_results_store(config)
+    if store:
+        store.add_prs(report)
+        store.close()
+    if list_of_prs:
+        with open("created_prs.txt", "w") as f:
+            for pr in list_of_prs:
+                f.write(f"{pr}\n")
+    return list_of_prs
+
 def update_constructionkit_versions():
     """ConstructionKit Versionen updaten und Pull Requests erstellen"""
     print(f"\n{Colors.BOLD}{Colors.YELLOW}🔄 CONSTRUCTIONKIT VERSIONEN UPDATEN{Colors.RESET}")
     print(f"{Colors.BLUE}{'─'*50}{Colors.RESET}")
     
-    if not GITHUB_TOKEN or GITHUB_TOKEN == "...":
+    # Tokens aus Umgebung/Token-Datei zählen schon für die Prüfung
+    try:
+        apply_configured_tokens(load_config())
+    except ValueError:
+        pass
+    if not CLIENT.has_token():
         print(f"{Colors.RED}❌ GitHub Token nicht konfiguriert!{Colors.RESET}")
         print(f"{Colors.YELLOW}Bitte erst Token in Option E konfigurieren.{Colors.RESET}")
         input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
         return
     
-    output_file = "output.json"
-    if not os.path.exists(output_file):
-        print(f"{Colors.RED}❌ output.json nicht gefunden!{Colors.RESET}")
+    config = load_config()
+    results = load_update_candidates(config)
+    if results is None:
+        print(f"{Colors.RED}❌ Keine Scan-Ergebnisse gefunden!{Colors.RESET}")
         print(f"{Colors.YELLOW}Bitte erst Versionen in Option A prüfen.{Colors.RESET}")
         input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
         return
@@ -339,118 +1340,166 @@ def update_constructionkit_versions():
         return
     
     try:
-        with open(output_file) as f:
-            config = json.load(f)
+        setup_client(config)
+        CLIENT.metrics.reset()
+        concurrency = int(config.get("concurrency", DEFAULT_CONCURRENCY))
+        state_dir = config.get("scan_state_dir", DEFAULT_SCAN_STATE_DIR)
         
-        recipe_path = config["recipe_path"]
-        list_of_prs = []
+        # Plan: vorhandene Update-Branches und offene PRs einmal pro Repo laden
+        print(f"\n{Colors.YELLOW}🔎 Prüfe vorhandene Update-Branches und Pull Requests...{Colors.RESET}")
+        plan = plan_update(results, new_version, concurrency)
+        writes = print_plan(plan)
+        if not writes:
+            print(f"\n{Colors.GREEN}✅ Nichts zu tun – alle PRs für {new_version} sind bereits offen.{Colors.RESET}")
+            input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
+            return
+        answer = input(f"\n{Colors.YELLOW}Plan ausführen? [j/N]: {Colors.RESET}").strip().lower()
+        if answer not in ("j", "ja", "y", "yes"):
+            print(f"{Colors.GRAY}Abgebrochen, es wurde nichts geschrieben.{Colors.RESET}")
+            input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
+            return
         
         print(f"\n{Colors.YELLOW}🔄 Aktualisiere auf Version: {new_version}{Colors.RESET}")
+        report = run_update(results, new_version, concurrency, state_dir, config.get("extra_recipe_paths", []),
+                            plan=plan)
         
-        for repo_full, branches_info in config['output'].items():
-            if not branches_info["latest_versions"]:
-                print(f"{Colors.GRAY}⏭️  {repo_full}: Keine Latest-Versions gefunden{Colors.RESET}")
-                continue
-            
-            print(f"\n{Colors.BOLD}🔄 Bearbeite {repo_full}...{Colors.RESET}")
-            
-            for branch, current_version in branches_info["latest_versions"]:
-                try:
-                    pr_branch = f"update-ckit-version-{branch}"
-                    owner, repo = repo_full.split("/")
-                    
-                    print(f"  {Colors.YELLOW}🔄 {branch}: {current_version} → {new_version}{Colors.RESET}")
-                    
-                    # Branch erstellen
-                    create_branch(owner, repo, branch, pr_branch)
-                    
-                    # Datei aktualisieren
-                    content, sha = get_file_content(owner, repo, recipe_path, branch)
-                    new_content = update_version_in_content(content, new_version)
-                    update_file(owner, repo, recipe_path, new_content, sha, pr_branch,
-                                f"Update constructionkit to {new_version}")
-                    
-                    # Pull Request erstellen
-                    pr_url = create_pull_request(
-                        owner, repo, pr_branch, branch,
-                        f"Update constructionkit to {new_version}",
-                        f"This PR updates constructionkit to version {new_version}."
-                    )
-                    
-                    print(f"    {Colors.GREEN}✅ PR erstellt: {pr_url}{Colors.RESET}")
-                    list_of_prs.append(pr_url)
-                    
-                except Exception as e:
-                    print(f"    {Colors.RED}❌ Fehler: {e}{Colors.RESET}")
-                
-                time.sleep(1)  # Rate limiting
-            
-            time.sleep(1)  # Rate limiting
-        
-        # PR-Liste speichern
+        list_of_prs = save_update_report(config, report)
         if list_of_prs:
-            with open("created_prs.txt", "w") as f:
-                for pr in list_of_prs:
-                    f.write(f"{pr}\n")
-            
             print(f"\n{Colors.GREEN}✅ {len(list_of_prs)} Pull Requests erstellt!{Colors.RESET}")
             print(f"{Colors.CYAN}Liste gespeichert in: created_prs.txt{Colors.RESET}")
         else:
             print(f"\n{Colors.YELLOW}⚠️  Keine Pull Requests erstellt.{Colors.RESET}")
+        if report["updated"]:
+            print(f"{Colors.GREEN}🔁 {report['updated']} offene PRs auf {new_version} aktualisiert.{Colors.RESET}")
+        if report["failed"]:
+            print(f"{Colors.RED}❌ {report['failed']} Branches fehlgeschlagen (Details in update_report.json){Colors.RESET}")
+        print_pool_stats()
+        print_request_stats(config, "update")
         
     except Exception as e:
         print(f"{Colors.RED}❌ Fehler: {e}{Colors.RESET}")
     
     input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
 
+def print_results(results):
+    """Ergebnisse im output.json-Format Repo für Repo ausgeben"""
+    print(f"{Colors.YELLOW}📋 Ergebnisse für Recipe Path: {Colors.CYAN}{results['recipe_path']}{Colors.RESET}")
+    
+    for repo_full, branches_info in results['output'].items():
+        print(f"\n{Colors.BOLD}📦 {repo_full}:{Colors.RESET}")
+        
+        # Fixed Versions
+        if branches_info["fixed_versions"]:
+            print(f"  {Colors.GREEN}🔒 Fixed Versions ({len(branches_info['fixed_versions'])}):{Colors.RESET}")
+            for branch, version in branches_info["fixed_versions"]:
+                print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version}")
+        
+        # Latest Versions
+        if branches_info["latest_versions"]:
+            print(f"  {Colors.YELLOW}🔄 Latest Versions ({len(branches_info['latest_versions'])}):{Colors.RESET}")
+            for branch, version in branches_info["latest_versions"]:
+                print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version}")
+        
+        # Unknown Versions
+        if branches_info["unknown_versions"]:
+            print(f"  {Colors.RED}❓ Unknown/Missing ({len(branches_info['unknown_versions'])}):{Colors.RESET}")
+            for branch, version in branches_info["unknown_versions"]:
+                print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version or 'N/A'}")
+
+def print_created_prs(store=None):
+    """Erstellte Pull Requests aus der Datenbank bzw. created_prs.txt ausgeben"""
+    if store:
+        prs = store.prs(limit=50)
+        if prs:
+            print(f"\n{Colors.BOLD}{Colors.GREEN}📋 Erstellte Pull Requests:{Colors.RESET}")
+            for i, (created, repo_full, branch, version, url) in enumerate(prs, 1):
+                print(f"  {i}. {Colors.CYAN}{url}{Colors.RESET} {Colors.GRAY}({repo_full} {branch} → {version}, {created}){Colors.RESET}")
+        return
+    pr_file = "created_prs.txt"
+    if os.path.exists(pr_file):
+        print(f"\n{Colors.BOLD}{Colors.GREEN}📋 Erstellte Pull Requests:{Colors.RESET}")
+        with open(pr_file) as f:
+            prs = f.read().strip().split('\n')
+            for i, pr in enumerate(prs, 1):
+                if pr.strip():
+                    print(f"  {i}. {Colors.CYAN}{pr}{Colors.RESET}")
+
+def query_results(store, run):
+    """Abfragen über die Ergebnis-Datenbank (Untermenü von Option D)"""
+    run_id = run[0]
+    while True:
+        print(f"\n{Colors.YELLOW}Lauf #{run_id} vom {run[2]} (Recipe Path: {run[3]}, Pattern: {run[4]}){Colors.RESET}")
+        print(f"[1] Übersicht aller Repositories")
+        print(f"[2] Branches mit Mindestversion unter X")
+        print(f"[3] Änderungen seit dem vorherigen Lauf")
+        print(f"[4] Branches eines Repositories")
+        print(f"[Enter] Zurück")
+        choice = input("Auswahl: ").strip()
+        
+        if choice == "1":
+            print_results(store.output(run_id))
+            print_created_prs(store)
+        elif choice == "2":
+            version = input(f"Version (z.B. 1.44.0): ").strip()
+            try:
+                rows = store.below_version(run_id, version)
+            except ValueError:
+                print(f"{Colors.RED}❌ Ungültige Version: {version}{Colors.RESET}")
+                continue
+            print(f"\n{Colors.BOLD}{len(rows)} Branches mit Mindestversion unter {version}:{Colors.RESET}")
+            for repo_full, branch, bucket, line in rows:
+                print(f"  {repo_full} {Colors.CYAN}{branch}{Colors.RESET}: {line} {Colors.GRAY}({bucket}){Colors.RESET}")
+        elif choice == "3":
+            previous = store.latest_run(offset=1)
+            if previous is None:
+                print(f"{Colors.YELLOW}⚠️  Kein vorheriger Lauf vorhanden.{Colors.RESET}")
+                continue
+            changes = store.changes(run_id, previous[0])
+            print(f"\n{Colors.BOLD}{len(changes)} Änderungen seit Lauf #{previous[0]} vom {previous[2]}:{Colors.RESET}")
+            for repo_full, branch, old, new in changes:
+                if old is None:
+                    print(f"  {Colors.GREEN}+ {repo_full} {branch}{Colors.RESET}: {new[1] or 'N/A'} ({new[0]})")
+                elif new is None:
+                    print(f"  {Colors.RED}- {repo_full} {branch}{Colors.RESET}: {old[1] or 'N/A'} ({old[0]})")
+                else:
+                    print(f"  {Colors.YELLOW}~ {repo_full} {branch}{Colors.RESET}: {old[1] or 'N/A'} → {new[1] or 'N/A'}")
+        elif choice == "4":
+            repo_full = input(f"Repository (org/name): ").strip()
+            rows = store.branches(run_id, repo_full)
+            if not rows:
+                print(f"{Colors.YELLOW}⚠️  Keine Branches für {repo_full} in Lauf #{run_id}.{Colors.RESET}")
+            for branch, bucket, line in rows:
+                print(f"  {Colors.CYAN}{branch}{Colors.RESET}: {line or 'N/A'} {Colors.GRAY}({bucket}){Colors.RESET}")
+        else:
+            return
+
 def show_last_results():
     """Letzte Ergebnisse anzeigen"""
     print(f"\n{Colors.BOLD}{Colors.MAGENTA}📊 LETZTE ERGEBNISSE ANZEIGEN{Colors.RESET}")
     print(f"{Colors.BLUE}{'─'*50}{Colors.RESET}")
     
-    output_file = "output.json"
-    if not os.path.exists(output_file):
-        print(f"{Colors.RED}❌ Keine Ergebnisse gefunden!{Colors.RESET}")
-        print(f"{Colors.YELLOW}Bitte erst Versionen in Option A prüfen.{Colors.RESET}")
-        input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
-        return
-    
     try:
-        with open(output_file) as f:
-            results = json.load(f)
-        
-        print(f"{Colors.YELLOW}📋 Ergebnisse für Recipe Path: {Colors.CYAN}{results['recipe_path']}{Colors.RESET}")
-        
-        for repo_full, branches_info in results['output'].items():
-            print(f"\n{Colors.BOLD}📦 {repo_full}:{Colors.RESET}")
-            
-            # Fixed Versions
-            if branches_info["fixed_versions"]:
-                print(f"  {Colors.GREEN}🔒 Fixed Versions ({len(branches_info['fixed_versions'])}):{Colors.RESET}")
-                for branch, version in branches_info["fixed_versions"]:
-                    print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version}")
-            
-            # Latest Versions
-            if branches_info["latest_versions"]:
-                print(f"  {Colors.YELLOW}🔄 Latest Versions ({len(branches_info['latest_versions'])}):{Colors.RESET}")
-                for branch, version in branches_info["latest_versions"]:
-                    print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version}")
-            
-            # Unknown Versions
-            if branches_info["unknown_versions"]:
-                print(f"  {Colors.RED}❓ Unknown/Missing ({len(branches_info['unknown_versions'])}):{Colors.RESET}")
-                for branch, version in branches_info["unknown_versions"]:
-                    print(f"    {Colors.CYAN}{branch}{Colors.RESET}: {version or 'N/A'}")
+        config = load_config()
+        store = open_results_store(config)
+        run = store.latest_run() if store else None
+        if run:
+            try:
+                query_results(store, run)
+            finally:
+                store.close()
+            return
+        if store:
+            store.close()
         
-        # PR-Liste anzeigen falls vorhanden
-        pr_file = "created_prs.txt"
-        if os.path.exists(pr_file):
-            print(f"\n{Colors.BOLD}{Colors.GREEN}📋 Erstellte Pull Requests:{Colors.RESET}")
-            with open(pr_file) as f:
-                prs = f.read().strip().split('\n')
-                for i, pr in enumerate(prs, 1):
-                    if pr.strip():
-                        print(f"  {i}. {Colors.CYAN}{pr}{Colors.RESET}")
+        # Ohne Datenbank: output.json wie bisher komplett ausgeben
+        results = load_results({"results_db": None})
+        if results is None:
+            print(f"{Colors.RED}❌ Keine Ergebnisse gefunden!{Colors.RESET}")
+            print(f"{Colors.YELLOW}Bitte erst Versionen in Option A prüfen.{Colors.RESET}")
+            input(f"\n{Colors.CYAN}Drücke Enter um fortzufahren...{Colors.RESET}")
+            return
+        print_results(results)
+        print_created_prs()
         
     except Exception as e:
         print(f"{Colors.RED}❌ Fehler beim Lesen der Ergebnisse: {e}{Colors.RESET}")
@@ -459,8 +1508,6 @@ def show_last_results():
 
 def configure_github_token():
     """GitHub Token konfigurieren"""
-    global GITHUB_TOKEN, HEADERS
-    
     print(f"\n{Colors.BOLD}{Colors.BLUE}⚙️  GITHUB TOKEN KONFIGURIEREN{Colors.RESET}")
     print(f"{Colors.BLUE}{'─'*50}{Colors.RESET}")
     
@@ -470,17 +1517,18 @@ def configure_github_token():
     print(f"  • repo")
     print(f"  • user")
     
-    current_status = "✅ Konfiguriert" if GITHUB_TOKEN and GITHUB_TOKEN != "..." else "❌ Nicht konfiguriert"
+    current_status = f"✅ Konfiguriert ({len(CLIENT.tokens)} Token)" if CLIENT.has_token() else "❌ Nicht konfiguriert"
     print(f"\n{Colors.YELLOW}Aktueller Status: {current_status}{Colors.RESET}")
     
-    new_token = input(f"\n{Colors.YELLOW}Neuen GitHub Token eingeben (oder Enter zum Abbrechen): {Colors.RESET}").strip()
+    new_token = input(f"\n{Colors.YELLOW}Neuen GitHub Token eingeben, mehrere durch Komma getrennt "
+                      f"(oder Enter zum Abbrechen): {Colors.RESET}").strip()
     
     if new_token:
-        GITHUB_TOKEN = new_token
-        HEADERS = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github.v3+json"}
-        print(f"\n{Colors.GREEN}✅ Token aktualisiert!{Colors.RESET}")
+        CLIENT.set_tokens(load_tokens(None, new_token))
+        print(f"\n{Colors.GREEN}✅ {len(CLIENT.tokens)} Token aktualisiert!{Colors.RESET}")
         print(f"{Colors.YELLOW}⚠️  Hinweis: Token wird nur für diese Session gespeichert.{Colors.RESET}")
-        print(f"{Colors.YELLOW}   Für permanente Speicherung bitte im Skript eintragen.{Colors.RESET}")
+        print(f"{Colors.YELLOW}   Für permanente Speicherung bitte im Skript eintragen, GITHUB_TOKENS setzen "
+              f"oder \"token_file\" in config.json angeben.{Colors.RESET}")
     else:
         print(f"\n{Colors.YELLOW}Token-Konfiguration abgebrochen.{Colors.RESET}")
     
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Lokaler Mock eines GitHub-Enterprise-Servers für Last- und Benchmark-Tests.
+
+Simuliert eine synthetische Flotte aus Repositories mit Release-Branches und
+den Endpunkten, die der RepoManager benutzt: Org-Repositories und Branches (paginiert),
+git/matching-refs, git/ref, Contents (JSON und raw), Git Data API (Trees,
+Commits, Refs anlegen/weitersetzen), Pull Requests und GraphQL-Blobabfragen. Latenz,
+Rate-Limit-Header und 5xx-Fehler sind einstellbar.
+
+    python mock_github.py --repos 50 --branches 200 --latency 30 --error-rate 0.01
+
+Danach z.B. `GITHUB_API_URL=http://127.0.0.1:8765/api/v3 python main.py` bzw.
+"api_url" in config.json setzen.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+RECIPE_PATH = "conanrecipe_ckit.txt"
+
+_GRAPHQL_BLOB = re.compile(r'(b\d+): object\(expression: ("(?:[^"\\]|\\.)*")\)')
+
+
+def _sha(*parts):
+    return hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()
+
+
+class Fleet:
+    """Synthetische Repositories samt allen Schreibzugriffen (Trees, Commits, Refs, PRs) im Speicher"""
+
+    def __init__(self, repos=10, branches=100, org="spx01", recipe_path=RECIPE_PATH, seed=1, padding=0):
+        self.recipe_path = recipe_path
+        self.seed = seed
+        self.padding = "".join(f"# {'-' * 76}\n" for _ in range(padding // 80))
+        self.repos = {}
+        self.commits = {}  # sha -> {"repo", "tree", "parents"}
+        self.trees = {}    # sha -> {"base": Tree-SHA oder None, "files": {Pfad: Inhalt}}
+        self.base_trees = {}  # Tree-SHA eines Original-Branches -> Branchname
+        self.pulls = {}    # repo -> [PR]
+        self.lock = threading.Lock()
+        for i in range(repos):
+            name = f"{org}/repo-{i:04d}"
+            names = ["main"] + [f"release/{j:04d}" for j in range(branches)] + \
+                    [f"feature/{j:04d}" for j in range(max(1, branches // 10))]
+            refs = {}
+            for branch in sorted(names):
+                sha = _sha(name, branch, 0)
+                refs[branch] = sha
+                self.commits[sha] = {"repo": name, "tree": "t" + sha[1:], "parents": []}
+                self.base_trees["t" + sha[1:]] = branch
+            self.repos[name] = refs
+            self.pulls[name] = []
+
+    def recipe(self, repo, branch):
+        """Synthetischer Recipe-Inhalt eines Original-Branches (None = Datei fehlt)"""
+        n = zlib.crc32(f"{self.seed}:{repo}:{branch}".encode()) % 100
+        minor = 30 + n % 20
+        if n < 50:
+            reference = f"constructionkit/[>=1.{minor}.0]@spx00/release"
+        elif n < 80:
+            reference = f"constructionkit/1.{minor}.0@spx00/release"
+        elif n < 90:
+            reference = f"constructionkit/[~1.{minor}]@spx00/release"
+        else:
+            return None
+        requires = "\n".join(f"dependency{k}/{k}.{n % 7}.0@spx00/release" for k in range(12))
+        return f"[requires]\n{requires}\n{reference}\n\n[generators]\ncmake\n{self.padding}"
+
+    def resolve(self, repo, ref):
+        """Branchname oder Commit-SHA auf einen Commit-SHA abbilden"""
+        refs = self.repos.get(repo)
+        if refs is None:
+            return None
+        if ref in refs:
+            return refs[ref]
+        return ref if ref in self.commits and self.commits[ref]["repo"] == repo else None
+
+    def read_file(self, repo, commit_sha, path):
+        """Datei in einem Commit lesen -> Inhalt oder None"""
+        commit = self.commits.get(commit_sha)
+        if commit is None:
+            return None
+        tree = commit["tree"]
+        while tree in self.trees:
+            entry = self.trees[tree]
+            if path in entry["files"]:
+                return entry["files"][path]
+            tree = entry["base"]
+        # Ursprünglicher Baum eines synthetischen Branches
+        branch = self.base_trees.get(tree)
+        if branch is None or path != self.recipe_path:
+            return None
+        return self.recipe(repo, branch)
+
+
+class MockGitHub:
+    """HTTP-Server mit einstellbarer Latenz, Rate-Limit-Headern und Fehlerinjektion"""
+
+    def __init__(self, fleet, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit=None, rate_window=3600, graphql_max_nodes=100, seed=None):
+        self.fleet = fleet
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.graphql_max_nodes = graphql_max_nodes
+        self.random = random.Random(seed)
+        self.budgets = {}  # Authorization -> [verbleibend, Reset-Zeitpunkt]
+        self.counts = {}   # "METHOD Route" -> Anzahl
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self):
+        """Server im Hintergrund-Thread starten"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, route):
+        with self.lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {}
+
+    def charge(self, token):
+        """Rate-Limit-Kontingent belasten -> (Limit, verbleibend, Reset, erlaubt?) oder None ohne Limit"""
+        if not self.rate_limit:
+            return None
+        with self.lock:
+            now = time.time()
+            budget = self.budgets.get(token)
+            if budget is None or now >= budget[1]:
+                budget = self.budgets[token] = [self.rate_limit, int(now + self.rate_window)]
+            if budget[0] > 0:
+                budget[0] -= 1
+                return self.rate_limit, budget[0], budget[1], True
+            return self.rate_limit, 0, budget[1], False
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+    def fail(self):
+        with self.lock:
+            return self.error_rate and self.random.random() < self.error_rate
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dürfen mitten im Body abbrechen (gestreamte Recipes) – kein Traceback dafür
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Header und Body gehen getrennt raus; mit Nagle würde jede Antwort auf das verzögerte ACK warten
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    # --- Antworten -------------------------------------------------------
+
+    def _reply(self, status, payload=None, raw=None, headers=None):
+        mock = self.server.mock
+        body = raw if raw is not None else json.dumps(payload).encode()
+        headers = dict(headers or {})
+        if raw is None:
+            headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        if self.command == "GET" and status == 200:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                # 304 zählt bei GitHub nicht gegen das Kontingent
+                status, body = 304, b""
+        if status != 304:
+            limits = mock.charge(self.headers.get("Authorization", ""))
+            if limits:
+                limit, remaining, reset, allowed = limits
+                headers.update({"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+                                "X-RateLimit-Reset": str(reset), "X-RateLimit-Used": str(limit - remaining)})
+                if not allowed:
+                    status, body = 403, json.dumps({"message": "API rate limit exceeded"}).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _page(self, items, query):
+        per_page = min(100, int(query.get("per_page", ["30"])[0]))
+        page = int(query.get("page", ["1"])[0])
+        last = max(1, -(-len(items) // per_page))
+        headers = {}
+        if last > 1:
+            base = f"http://{self.headers.get('Host')}{urlparse(self.path).path}"
+            params = "&".join(f"{k}={v[0]}" for k, v in query.items() if k not in ("page", "per_page"))
+            params = (params + "&") if params else ""
+            links = []
+            if page < last:
+                links.append(f'<{base}?{params}per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}?{params}per_page={per_page}&page={last}>; rel="last"')
+            headers["Link"] = ", ".join(links)
+        self._reply(200, items[(page - 1) * per_page:page * per_page], headers=headers)
+
+    def _not_found(self):
+        self._reply(404, {"message": "Not Found"})
+
+    # --- Dispatcher ------------------------------------------------------
+
+    def _handle(self):
+        mock = self.server.mock
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        if path.startswith("/api/v3"):
+            path = path[len("/api/v3"):]
+        if path in ("/api/graphql", "/graphql"):
+            path = "/graphql"
+
+        # Body immer vollständig lesen, sonst ist die Keep-Alive-Verbindung danach unbrauchbar
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+
+        mock.delay()
+        route = self._route(path)
+        mock.count(f"{self.command} {route}")
+        if route != "/_stats" and mock.fail():
+            return self._reply(mock.random.choice((500, 502, 503)), {"message": "Server Error"})
+
+        if path == "/_stats":
+            return self._reply(200, mock.counts)
+        if path == "/rate_limit":
+            return self._reply(200, {"resources": {}})
+        if path == "/graphql" and self.command == "POST":
+            return self._graphql(body)
+
+        match = re.match(r"^/orgs/([^/]+)/repos$", path)
+        if match and self.command == "GET":
+            return self._page([{"full_name": name, "name": name.split("/", 1)[1], "archived": False,
+                                "default_branch": "main"}
+                               for name in mock.fleet.repos if name.startswith(match.group(1) + "/")], query)
+
+        match = re.match(r"^/repos/([^/]+/[^/]+)(/.*)?$", path)
+        if not match or match.group(1) not in mock.fleet.repos:
+            return self._not_found()
+        repo, rest = match.group(1), match.group(2) or ""
+        with mock.fleet.lock:
+            return self._repo(repo, rest, query, body)
+
+    @staticmethod
+    def _route(path):
+        route = re.sub(r"^/repos/[^/]+/[^/]+", "/repos/:owner/:repo", path)
+        route = re.sub(r"^/orgs/[^/]+", "/orgs/:org", route)
+        route = re.sub(r"/(contents|ref/heads|matching-refs/heads|commits)/.*$", r"/\1/*", route)
+        return route
+
+    def _repo(self, repo, rest, query, body):
+        fleet = self.server.mock.fleet
+        refs = fleet.repos[repo]
+        method = self.command
+
+        if method == "GET" and rest == "/branches":
+            return self._page([{"name": b, "commit": {"sha": sha}} for b, sha in refs.items()], query)
+
+        match = re.match(r"^/git/matching-refs/heads/(.*)$", rest)
+        if method == "GET" and match:
+            prefix = match.group(1)
+            return self._page([{"ref": f"refs/heads/{b}", "object": {"sha": sha, "type": "commit"}}
+                               for b, sha in refs.items() if b.startswith(prefix)], query)
+
+        match = re.match(r"^/git/refs?/heads/(.+)$", rest)
+        if method == "GET" and match:
+            branch = match.group(1)
+            if branch not in refs:
+                return self._not_found()
+            return self._reply(200, {"ref": f"refs/heads/{branch}", "object": {"sha": refs[branch], "type": "commit"}})
+
+        if method == "PATCH" and match:
+            branch, sha = match.group(1), body.get("sha")
+            if branch not in refs:
+                return self._reply(422, {"message": "Reference does not exist"})
+            if sha not in fleet.commits:
+                return self._reply(422, {"message": "Object does not exist"})
+            if not body.get("force") and refs[branch] not in fleet.commits[sha]["parents"]:
+                return self._reply(422, {"message": "Update is not a fast forward"})
+            refs[branch] = sha
+            return self._reply(200, {"ref": f"refs/heads/{branch}", "object": {"sha": sha}})
+
+        match = re.match(r"^/git/commits/([0-9a-f]+)$", rest)
+        if method == "GET" and match:
+            commit = fleet.commits.get(match.group(1))
+            if commit is None or commit["repo"] != repo:
+                return self._not_found()
+            return self._reply(200, {"sha": match.group(1), "tree": {"sha": commit["tree"]},
+                                     "parents": [{"sha": p} for p in commit["parents"]]})
+
+        match = re.match(r"^/contents/(.+)$", rest)
+        if match and method == "GET":
+            commit_sha = fleet.resolve(repo, query.get("ref", ["main"])[0])
+            content = fleet.read_file(repo, commit_sha, match.group(1)) if commit_sha else None
+            if content is None:
+                return self._not_found()
+            data = content.encode()
+            blob_sha = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+            if "raw" in self.headers.get("Accept", ""):
+                return self._reply(200, raw=data, headers={"Content-Type": "text/plain; charset=utf-8"})
+            return self._reply(200, {"type": "file", "path": match.group(1), "sha": blob_sha, "size": len(data),
+                                     "encoding": "base64", "content": base64.encodebytes(data).decode()})
+        if match and method == "PUT":
+            branch = body.get("branch", "main")
+            if branch not in refs:
+                return self._not_found()
+            content = base64.b64decode(body["content"]).decode()
+            tree = _sha("tree", time.time_ns(), content)
+            parent = refs[branch]
+            fleet.trees[tree] = {"base": fleet.commits[parent]["tree"], "files": {match.group(1): content}}
+            sha = _sha("commit", tree, parent)
+            fleet.commits[sha] = {"repo": repo, "tree": tree, "parents": [parent]}
+            refs[branch] = sha
+            return self._reply(200, {"commit": {"sha": sha}})
+
+        if method == "POST" and rest == "/git/trees":
+            files = {entry["path"]: entry["content"] for entry in body.get("tree", [])}
+            tree = _sha("tree", body.get("base_tree"), json.dumps(files, sort_keys=True))
+            fleet.trees[tree] = {"base": body.get("base_tree"), "files": files}
+            return self._reply(201, {"sha": tree})
+
+        if method == "POST" and rest == "/git/commits":
+            if body.get("tree") not in fleet.trees:
+                return self._reply(422, {"message": "Tree SHA does not exist"})
+            sha = _sha("commit", body["tree"], *body.get("parents", []), body.get("message"))
+            fleet.commits[sha] = {"repo": repo, "tree": body["tree"], "parents": body.get("parents", [])}
+            return self._reply(201, {"sha": sha})
+
+        if method == "POST" and rest == "/git/refs":
+            name = body.get("ref", "")[len("refs/heads/"):]
+            if name in refs:
+                return self._reply(422, {"message": "Reference already exists"})
+            if body.get("sha") not in fleet.commits:
+                return self._reply(422, {"message": "Object does not exist"})
+            refs[name] = body["sha"]
+            return self._reply(201, {"ref": body["ref"], "object": {"sha": body["sha"]}})
+
+        if rest == "/pulls":
+            pulls = fleet.pulls[repo]
+            if method == "GET":
+                state = query.get("state", ["open"])[0]
+                head = query.get("head", [None])[0]
+                items = [p for p in pulls if state == "all" or p["state"] == state]
+                if head:
+                    items = [p for p in items if f"{repo.split('/')[0]}:{p['head']['ref']}" == head]
+                return self._page(items, query)
+            if method == "POST":
+                head, base = body.get("head"), body.get("base")
+                if head not in refs or base not in refs:
+                    return self._reply(422, {"message": "Validation Failed"})
+                if any(p["head"]["ref"] == head and p["state"] == "open" for p in pulls):
+                    return self._reply(422, {"message": f"A pull request already exists for {head}."})
+                number = len(pulls) + 1
+                pull = {"number": number, "state": "open", "title": body.get("title"), "body": body.get("body"),
+                        "html_url": f"https://github.mock/{repo}/pull/{number}",
+                        "head": {"ref": head, "sha": refs[head]}, "base": {"ref": base}}
+                pulls.append(pull)
+                return self._reply(201, pull)
+
+        match = re.match(r"^/pulls/(\d+)$", rest)
+        if match and method == "PATCH":
+            number = int(match.group(1))
+            pull = next((p for p in fleet.pulls[repo] if p["number"] == number), None)
+            if pull is None:
+                return self._not_found()
+            pull.update({key: body[key] for key in ("title", "body", "state") if key in body})
+            return self._reply(200, pull)
+
+        return self._not_found()
+
+    def _graphql(self, body):
+        mock = self.server.mock
+        fleet = mock.fleet
+        variables = body.get("variables") or {}
+        repo = f"{variables.get('owner')}/{variables.get('name')}"
+        aliases = _GRAPHQL_BLOB.findall(body.get("query", ""))
+        if len(aliases) > mock.graphql_max_nodes:
+            return self._reply(200, {"errors": [{"type": "MAX_NODE_LIMIT_EXCEEDED",
+                                                 "message": f"{len(aliases)} nodes > {mock.graphql_max_nodes}"}]})
+        if repo not in fleet.repos:
+            return self._reply(200, {"data": {"repository": None},
+                                     "errors": [{"type": "NOT_FOUND", "message": f"Could not resolve {repo}"}]})
+        result = {}
+        with fleet.lock:
+            for alias, expression in aliases:
+                ref, _, path = json.loads(expression).partition(":")
+                commit_sha = fleet.resolve(repo, ref)
+                content = fleet.read_file(repo, commit_sha, path) if commit_sha else None
+                if content is None:
+                    result[alias] = None
+                else:
+                    data = content.encode()
+                    result[alias] = {"text": content, "isTruncated": False,
+                                     "oid": hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()}
+        return self._reply(200, {"data": {"repository": result}})
+
+    do_GET = do_POST = do_PUT = do_PATCH = _handle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repos", type=int, default=10, help="Anzahl Repositories")
+    parser.add_argument("--branches", type=int, default=100, help="Release-Branches pro Repository")
+    parser.add_argument("--org", default="spx01")
+    parser.add_argument("--recipe-path", default=RECIPE_PATH)
+    parser.add_argument("--recipe-padding", type=int, default=0, help="Bytes hinter der ConstructionKit-Zeile")
+    parser.add_argument("--latency", type=float, default=0.0, help="mittlere Antwortzeit in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Streuung der Antwortzeit in ms (±)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil zufälliger 5xx-Antworten (0..1)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Anfragen pro Token und Fenster")
+    parser.add_argument("--rate-window", type=int, default=3600, help="Länge des Rate-Limit-Fensters in s")
+    parser.add_argument("--graphql-max-nodes", type=int, default=100)
+    args = parser.parse_args()
+
+    fleet = Fleet(args.repos, args.branches, args.org, args.recipe_path, padding=args.recipe_padding)
+    mock = MockGitHub(fleet, args.host, args.port, args.latency, args.jitter, args.error_rate,
+                      args.rate_limit, args.rate_window, args.graphql_max_nodes)
+    print(f"Mock-GitHub unter {mock.url} ({args.repos} Repos × {args.branches} Release-Branches)")
+    print(json.dumps({"api_url": mock.url, "recipe_path": args.recipe_path, "branch_pattern": "release/*",
+                      "repos": list(fleet.repos)[:3] + (["..."] if len(fleet.repos) > 3 else [])}))
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
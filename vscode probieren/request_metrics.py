@@ -0,0 +1,232 @@
+"""
+Messwerte pro API-Endpunkt für den RepoManager.
+
+Der GitHubClient meldet jede Anfrage hierher: Anzahl, Latenz (als Histogramm),
+übertragene Bytes, Wiederholungen, Cache-Treffer und die Zeit, die eine
+Anfrage vor dem Senden in der Drosselung gewartet hat. Am Ende eines Scans
+oder Updates wird daraus eine Tabelle bzw. eine JSON-/Prometheus-Datei.
+
+Endpunkte werden zu Vorlagen zusammengefasst, damit nicht jeder Branch eine
+eigene Zeile bekommt:
+    GET /repos/spx01/X/contents/r.txt?ref=main  ->  GET /repos/:owner/:repo/contents/*
+"""
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+# Obergrenzen der Latenz-Buckets in Sekunden (Prometheus-Konvention: kumulativ, +Inf am Ende)
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Pfadteile, die Teil der Endpunkt-Vorlage bleiben; alles danach wird zu "*"
+_STATIC_SEGMENTS = {
+    "branches", "contents", "git", "ref", "refs", "matching-refs", "heads", "trees", "commits",
+    "blobs", "pulls", "api", "graphql", "orgs", "repos", "user", "rate_limit",
+}
+
+# Platzhalter für Repository- bzw. Organisationsnamen am Pfadanfang
+_PATH_PREFIXES = (
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/:owner/:repo"),
+    (re.compile(r"^/orgs/[^/]+"), "/orgs/:org"),
+)
+
+
+def endpoint_for(method, url, base_path=""):
+    """Anfrage auf eine Endpunkt-Vorlage abbilden ("GET /repos/:owner/:repo/git/ref/heads/*")"""
+    path = urlparse(url).path
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path):]
+    prefix, rest = "", path
+    for pattern, placeholder in _PATH_PREFIXES:
+        match = pattern.match(path)
+        if match:
+            prefix, rest = placeholder, path[match.end():]
+            break
+    parts = []
+    for segment in rest.strip("/").split("/"):
+        if not segment:
+            continue
+        if segment not in _STATIC_SEGMENTS:
+            parts.append("*")
+            break
+        parts.append(segment)
+    return f"{method} {prefix}/{'/'.join(parts)}" if parts else f"{method} {prefix or '/'}"
+
+
+class EndpointStats:
+    """Zähler eines Endpunkts"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.bytes_cached = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.throttled = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, latency):
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Näherung eines Perzentils aus dem Histogramm (Obergrenze des Buckets, höchstens das Maximum)"""
+        total = sum(self.buckets)
+        if not total:
+            return 0.0
+        rank = fraction * total
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(LATENCY_BUCKETS[i], self.latency_max) if i < len(LATENCY_BUCKETS) else self.latency_max
+        return self.latency_max
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "bytes_cached": self.bytes_cached,
+            "latency_seconds_sum": round(self.latency_sum, 6),
+            "latency_seconds_max": round(self.latency_max, 6),
+            "latency_p50": self.percentile(0.5),
+            "latency_p95": self.percentile(0.95),
+            "throttled_seconds": round(self.throttled, 6),
+            "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.buckets)),
+        }
+
+
+class RequestMetrics:
+    """Threadsichere Sammlung der Messwerte aller Endpunkte"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Alle Zähler zurücksetzen (vor jedem Scan/Update)"""
+        with self.lock:
+            self.endpoints = {}
+            self.started = time.time()
+
+    def _entry(self, endpoint):
+        entry = self.endpoints.get(endpoint)
+        if entry is None:
+            entry = self.endpoints[endpoint] = EndpointStats()
+        return entry
+
+    def record(self, endpoint, latency, status, bytes_sent=0, bytes_received=0, throttled=0.0, retries=0):
+        """Eine abgeschlossene Anfrage (inkl. aller Wiederholungen) erfassen"""
+        with self.lock:
+            entry = self._entry(endpoint)
+            entry.calls += 1
+            entry.retries += retries
+            entry.bytes_sent += bytes_sent
+            entry.bytes_received += bytes_received
+            entry.throttled += throttled
+            if status is None or status >= 400:
+                entry.errors += 1
+            entry.observe(latency)
+
+    def add_received(self, endpoint, size):
+        """Nachträglich gelesene Bytes einer gestreamten Antwort erfassen"""
+        with self.lock:
+            self._entry(endpoint).bytes_received += size
+
+    def cache_hit(self, endpoint, size):
+        """304 wurde aus dem lokalen Cache bedient; `size` ist die eingesparte Body-Größe"""
+        with self.lock:
+            entry = self._entry(endpoint)
+            entry.cache_hits += 1
+            entry.bytes_cached += size
+
+    def snapshot(self):
+        """Aktueller Stand -> {"elapsed_seconds": ..., "endpoints": {Endpunkt: {...}}}"""
+        with self.lock:
+            return {
+                "elapsed_seconds": round(time.time() - self.started, 3),
+                "endpoints": {name: stats.as_dict() for name, stats in sorted(self.endpoints.items())},
+            }
+
+    def totals(self):
+        """Summen über alle Endpunkte"""
+        snapshot = self.snapshot()
+        keys = ("calls", "errors", "retries", "cache_hits", "bytes_sent", "bytes_received", "bytes_cached",
+                "latency_seconds_sum", "throttled_seconds")
+        totals = {key: sum(e[key] for e in snapshot["endpoints"].values()) for key in keys}
+        totals["elapsed_seconds"] = snapshot["elapsed_seconds"]
+        return totals
+
+    def write_json(self, path, extra=None):
+        """Messwerte als JSON schreiben (z.B. zum Vergleich mehrerer Läufe)"""
+        data = self.snapshot()
+        data["totals"] = self.totals()
+        if extra:
+            data.update(extra)
+        _atomic_write(path, json.dumps(data, indent=4))
+
+    def write_prometheus(self, path, job="repomanager"):
+        """Messwerte im Textformat für den node_exporter-Textfile-Collector schreiben"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(endpoint, **more):
+            method, _, path = endpoint.partition(" ")
+            pairs = {"job": job, "method": method, "endpoint": path, **more}
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+        counters = (
+            ("github_requests_total", "calls", "Anzahl der API-Anfragen"),
+            ("github_request_errors_total", "errors", "Anfragen mit Status >= 400 oder Verbindungsfehler"),
+            ("github_request_retries_total", "retries", "Wiederholte Versuche (5xx, Rate-Limit, Verbindung)"),
+            ("github_cache_hits_total", "cache_hits", "Aus dem ETag-Cache bediente Antworten (304)"),
+            ("github_request_bytes_sent_total", "bytes_sent", "Gesendete Bytes im Request-Body"),
+            ("github_response_bytes_total", "bytes_received", "Empfangene Bytes im Response-Body"),
+            ("github_cached_bytes_total", "bytes_cached", "Aus dem ETag-Cache gelieferte Bytes"),
+            ("github_throttled_seconds_total", "throttled_seconds", "Wartezeit in der Drosselung"),
+        )
+        for name, key, help_text in counters:
+            metric(name, "counter", help_text)
+            for endpoint, stats in snapshot["endpoints"].items():
+                lines.append(f"{name}{labels(endpoint)} {stats[key]}")
+
+        name = "github_request_duration_seconds"
+        metric(name, "histogram", "Latenz der API-Anfragen")
+        for endpoint, stats in snapshot["endpoints"].items():
+            cumulative = 0
+            for bound, count in stats["latency_buckets"].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{labels(endpoint, le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{labels(endpoint)} {stats['latency_seconds_sum']}")
+            lines.append(f"{name}_count{labels(endpoint)} {stats['calls']}")
+
+        metric("repomanager_run_seconds", "gauge", "Dauer des letzten Laufs")
+        lines.append(f'repomanager_run_seconds{{job="{job}"}} {snapshot["elapsed_seconds"]}')
+        _atomic_write(path, "\n".join(lines) + "\n")
+
+
+def _atomic_write(path, text):
+    # Textfile-Collector darf nie eine halb geschriebene Datei sehen
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
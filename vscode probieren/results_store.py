@@ -0,0 +1,229 @@
+"""
+SQLite-Ablage für Scan-Läufe, Branch-Ergebnisse und erstellte Pull Requests.
+
+output.json bleibt das Austauschformat, für Abfragen über viele Läufe und
+tausende Branches wird aber nicht mehr die ganze Datei geparst:
+
+    * welche Branches lassen noch Versionen unter X zu
+    * was hat sich seit dem vorherigen Lauf geändert
+    * welche Branches gehören zu einem Repository
+
+Die kleinste zulässige Version jeder Referenz wird beim Speichern über
+ckit_version berechnet und als sortierbarer Schlüssel indiziert.
+"""
+import sqlite3
+import threading
+import time
+
+from ckit_version import parse_reference, parse_version
+from scan_log import BUCKET_KEYS, write_output
+
+DEFAULT_PATH = "results.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    finished TEXT,
+    recipe_path TEXT NOT NULL,
+    branch_pattern TEXT
+);
+CREATE TABLE IF NOT EXISTS run_repos (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    repo TEXT NOT NULL,
+    PRIMARY KEY (run_id, repo)
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    bucket TEXT NOT NULL,
+    version TEXT NOT NULL,
+    min_version TEXT,
+    PRIMARY KEY (run_id, repo, branch)
+);
+CREATE INDEX IF NOT EXISTS results_by_min_version ON results (run_id, min_version);
+CREATE INDEX IF NOT EXISTS results_by_bucket ON results (run_id, bucket);
+CREATE INDEX IF NOT EXISTS results_by_branch ON results (repo, branch, run_id);
+CREATE TABLE IF NOT EXISTS prs (
+    id INTEGER PRIMARY KEY,
+    created TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    pr_branch TEXT NOT NULL,
+    version TEXT NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prs_by_branch ON prs (repo, branch);
+"""
+
+
+def version_key(version):
+    """Versionstupel in einen lexikographisch sortierbaren Schlüssel wandeln ((1, 43) -> "000001.000043.000000")"""
+    if version is None:
+        return None
+    parts = list(version[:3]) + [0] * (3 - len(version[:3]))
+    return ".".join(f"{part:06d}" for part in parts)
+
+
+def min_version_key(line):
+    """Sortierschlüssel der kleinsten Version, die eine ConstructionKit-Zeile zulässt"""
+    if not line:
+        return None
+    return version_key(parse_reference(line).minimum)
+
+
+class ResultsStore:
+    """Indizierte Ablage aller Scan-Läufe"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    # --- Schreiben -------------------------------------------------------
+
+    def import_run(self, recipe_path, branch_pattern, repo_results, started=None):
+        """Einen abgeschlossenen Scan speichern -> run_id
+
+        `repo_results` liefert (repo, {Kategorie: [(branch, version)]}) in
+        output.json-Reihenfolge, z.B. ScanLog.repo_results(); es wird gestreamt.
+        """
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.lock, self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (started, recipe_path, branch_pattern) VALUES (?, ?, ?)",
+                (started or now, recipe_path, branch_pattern)).lastrowid
+            for position, (repo_full, data) in enumerate(repo_results):
+                self.db.execute("INSERT INTO run_repos VALUES (?, ?, ?)", (run_id, position, repo_full))
+                self._insert_results(run_id, repo_full, data)
+            self.db.execute("UPDATE runs SET finished = ? WHERE id = ?", (now, run_id))
+        return run_id
+
+    def replace_repo(self, run_id, repo_full, data):
+        """Ergebnisse eines Repos in einem bestehenden Lauf ersetzen (Watch-Modus)
+
+        Neue Repos werden hinten angehängt; `finished` des Laufs wird auf jetzt gesetzt.
+        """
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO run_repos SELECT ?, COALESCE(MAX(position) + 1, 0), ? "
+                "FROM run_repos WHERE run_id = ?", (run_id, repo_full, run_id))
+            self.db.execute("DELETE FROM results WHERE run_id = ? AND repo = ?", (run_id, repo_full))
+            self._insert_results(run_id, repo_full, data)
+            self.db.execute("UPDATE runs SET finished = ? WHERE id = ?", (now, run_id))
+
+    def _insert_results(self, run_id, repo_full, data):
+        self.db.executemany(
+            "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((run_id, repo_full, branch, index, bucket, version or "", min_version_key(version))
+             for bucket in BUCKET_KEYS
+             for index, (branch, version) in enumerate(data.get(bucket, []))))
+
+    def add_prs(self, report):
+        """Erstellte Pull Requests aus einem Update-Report speichern"""
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT INTO prs (created, repo, branch, pr_branch, version, url) VALUES (?, ?, ?, ?, ?, ?)",
+                ((now, r["repo"], r["branch"], r["pr_branch"], report["version"], r["pr_url"])
+                 for r in report["results"] if r["status"] == "created"))
+
+    # --- Lesen -----------------------------------------------------------
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def latest_run(self, offset=0):
+        """Letzten (bzw. `offset` Läufe davor) abgeschlossenen Lauf -> Zeile oder None"""
+        rows = self._query(
+            "SELECT id, started, finished, recipe_path, branch_pattern FROM runs "
+            "WHERE finished IS NOT NULL ORDER BY id DESC LIMIT 1 OFFSET ?", (offset,))
+        return rows[0] if rows else None
+
+    def repos(self, run_id):
+        return [row[0] for row in self._query(
+            "SELECT repo FROM run_repos WHERE run_id = ? ORDER BY position", (run_id,))]
+
+    def branches(self, run_id, repo_full, bucket=None):
+        """Branches eines Repos -> [(branch, bucket, version)]"""
+        sql = "SELECT branch, bucket, version FROM results WHERE run_id = ? AND repo = ?"
+        params = [run_id, repo_full]
+        if bucket:
+            sql += " AND bucket = ?"
+            params.append(bucket)
+        return self._query(sql + " ORDER BY bucket, position", params)
+
+    def by_bucket(self, run_id, bucket):
+        """Alle Branches einer Kategorie in output.json-Reihenfolge -> [(repo, branch, version)]"""
+        return self._query(
+            "SELECT r.repo, r.branch, r.version FROM results r "
+            "JOIN run_repos p ON p.run_id = r.run_id AND p.repo = r.repo "
+            "WHERE r.run_id = ? AND r.bucket = ? ORDER BY p.position, r.position", (run_id, bucket))
+
+    def below_version(self, run_id, version):
+        """Branches, deren kleinste zulässige Version unter `version` liegt -> [(repo, branch, bucket, Zeile)]
+
+        Referenzen ohne auswertbare Untergrenze erscheinen nicht.
+        """
+        key = version_key(parse_version(version))
+        return self._query(
+            "SELECT repo, branch, bucket, version FROM results "
+            "WHERE run_id = ? AND min_version IS NOT NULL AND min_version < ? ORDER BY min_version, repo, branch",
+            (run_id, key))
+
+    def changes(self, run_id, previous_id):
+        """Unterschiede zwischen zwei Läufen -> [(repo, branch, alt, neu)] mit (bucket, version) oder None"""
+        rows = self._query("""
+            SELECT n.repo, n.branch, o.bucket, o.version, n.bucket, n.version
+            FROM results n LEFT JOIN results o
+              ON o.run_id = ? AND o.repo = n.repo AND o.branch = n.branch
+            WHERE n.run_id = ? AND (o.branch IS NULL OR o.bucket != n.bucket OR o.version != n.version)
+            UNION ALL
+            SELECT o.repo, o.branch, o.bucket, o.version, NULL, NULL
+            FROM results o LEFT JOIN results n
+              ON n.run_id = ? AND n.repo = o.repo AND n.branch = o.branch
+            WHERE o.run_id = ? AND n.branch IS NULL
+            ORDER BY 1, 2""", (previous_id, run_id, run_id, previous_id))
+        return [(repo, branch, (ob, ov) if ob else None, (nb, nv) if nb else None)
+                for repo, branch, ob, ov, nb, nv in rows]
+
+    def prs(self, limit=None):
+        sql = "SELECT created, repo, branch, version, url FROM prs ORDER BY id"
+        if limit:
+            return self._query(sql + " DESC LIMIT ?", (limit,))[::-1]
+        return self._query(sql)
+
+    def output(self, run_id):
+        """Einen Lauf im output.json-Format zusammensetzen -> {"recipe_path", "output"}"""
+        recipe_path = self._query("SELECT recipe_path FROM runs WHERE id = ?", (run_id,))[0][0]
+        output = {repo_full: {key: [] for key in BUCKET_KEYS} for repo_full in self.repos(run_id)}
+        for bucket in BUCKET_KEYS:
+            for repo_full, branch, version in self.by_bucket(run_id, bucket):
+                output[repo_full][bucket].append([branch, version])
+        return {"recipe_path": recipe_path, "output": output}
+
+    def export_output(self, run_id, output_path):
+        """Einen Lauf im bisherigen output.json-Format schreiben"""
+        run = self._query("SELECT recipe_path FROM runs WHERE id = ?", (run_id,))[0]
+
+        def repo_results():
+            for repo_full in self.repos(run_id):
+                data = {key: [] for key in BUCKET_KEYS}
+                for branch, bucket, version in self.branches(run_id, repo_full):
+                    data[bucket].append((branch, version))
+                yield repo_full, data
+
+        write_output(output_path, run[0], repo_results())
@@ -0,0 +1,184 @@
+"""
+Append-only JSONL-Protokoll eines Scans mit Wiederaufnahme nach Abbruch.
+
+Jeder fertig geprüfte Branch wird sofort als eigene Zeile geschrieben. Bricht
+ein Scan ab (Netzwerkfehler, abgelaufener Token, Strg+C), kann der nächste
+Lauf die bereits protokollierten Branches überspringen. output.json wird am
+Ende Repo für Repo aus dem Protokoll erzeugt (repo_results + write_output),
+sodass nie der gesamte Datenbestand im Speicher liegen muss.
+
+Zeilentypen:
+    {"type": "run", "recipe_path": ..., "branch_pattern": ..., "started": ...}
+    {"type": "branch", "repo": ..., "index": ..., "branch": ..., "bucket": ..., "version": ...}
+    {"type": "repo", "repo": ..., "branches": ...}   # Repo vollständig geprüft
+    {"type": "done"}                                  # Scan vollständig
+"""
+import json
+import os
+import time
+
+BUCKET_KEYS = ("fixed_versions", "latest_versions", "unknown_versions")
+
+
+class ScanLog:
+    """Schreibt Scan-Ergebnisse zeilenweise und liest sie zur Wiederaufnahme wieder ein"""
+
+    def __init__(self, path="scan_log.jsonl"):
+        self.path = path
+        self.file = None
+
+    def read_header(self):
+        """Kopfzeile des vorhandenen Protokolls lesen -> (header, abgeschlossen?) oder (None, False)"""
+        if not os.path.exists(self.path):
+            return None, False
+        header, done = None, False
+        for record in self._records():
+            if record.get("type") == "run" and header is None:
+                header = record
+            elif record.get("type") == "done":
+                done = True
+        return header, done
+
+    def resumable(self, recipe_path, branch_pattern):
+        """Prüfen, ob ein unterbrochener Scan mit denselben Parametern vorliegt"""
+        header, done = self.read_header()
+        return (header is not None and not done
+                and header.get("recipe_path") == recipe_path
+                and header.get("branch_pattern") == branch_pattern)
+
+    def progress(self):
+        """Bereits erledigte Arbeit lesen -> {repo: True (fertig) oder {bereits geprüfte Branches}}"""
+        skip = {}
+        for record in self._records():
+            if record.get("type") == "branch":
+                entry = skip.setdefault(record["repo"], set())
+                if entry is not True:
+                    entry.add(record["branch"])
+            elif record.get("type") == "repo":
+                skip[record["repo"]] = True
+        return skip
+
+    def start(self, recipe_path, branch_pattern, resume=False):
+        """Protokoll öffnen; ohne `resume` wird ein neues angelegt"""
+        if resume:
+            self._trim_partial_line()
+            self.file = open(self.path, "a")
+            return
+        self.file = open(self.path, "w")
+        self._write({"type": "run", "recipe_path": recipe_path, "branch_pattern": branch_pattern,
+                     "started": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def record(self, repo_full, index, branch, bucket, version):
+        """Ergebnis eines Branches anhängen"""
+        self._write({"type": "branch", "repo": repo_full, "index": index, "branch": branch,
+                     "bucket": bucket, "version": version})
+
+    def repo_done(self, repo_full, branch_count):
+        """Repo als vollständig geprüft markieren"""
+        self._write({"type": "repo", "repo": repo_full, "branches": branch_count})
+
+    def finish(self):
+        """Scan als vollständig markieren und Protokoll schließen"""
+        self._write({"type": "done"})
+        self.close()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _trim_partial_line(self):
+        """Eine beim Absturz halb geschriebene letzte Zeile abschneiden
+
+        Sonst hinge der erste neue Eintrag an diesem Rest und ginge beim
+        Lesen mit ihm verloren.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Rückwärts in Blöcken bis zum letzten vollständigen Zeilenende suchen
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def _records(self, offset=0):
+        """Protokollzeilen lesen; eine beim Absturz halb geschriebene letzte Zeile wird ignoriert"""
+        with open(self.path) as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def repo_results(self, repos):
+        """Ergebnisse Repo für Repo lesen -> (repo, {Kategorie: [(branch, version)]})
+
+        Im ersten Durchlauf werden nur Byte-Offsets pro Repo gesammelt, danach
+        wird jedes Repo einzeln eingelesen. So liegt immer nur ein Repo im
+        Speicher. Reihenfolge: `repos`, innerhalb eines Repos der Branch-Index.
+        """
+        offsets = {}
+        finished = set()
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = {}
+                if record.get("type") == "branch":
+                    offsets.setdefault(record["repo"], []).append((record["index"], offset))
+                elif record.get("type") == "repo":
+                    finished.add(record["repo"])
+                offset += len(line)
+
+        with open(self.path, "rb") as log:
+            for repo_full in dict.fromkeys(repos):
+                if repo_full not in finished and repo_full not in offsets:
+                    continue
+                data = {key: [] for key in BUCKET_KEYS}
+                seen = set()
+                for _, pos in sorted(offsets.get(repo_full, [])):
+                    log.seek(pos)
+                    record = json.loads(log.readline())
+                    if record["branch"] in seen:
+                        continue
+                    seen.add(record["branch"])
+                    data[record["bucket"]].append((record["branch"], record["version"]))
+                yield repo_full, data
+
+
+def write_output(output_path, recipe_path, repo_items):
+    """output.json Repo für Repo schreiben; Format wie json.dump(..., indent=4)
+
+    `repo_items` liefert (repo, {Kategorie: [(branch, version)]}) in der
+    gewünschten Reihenfolge. Die Datei wird atomar ersetzt.
+    """
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as out:
+        out.write('{\n    "recipe_path": ' + json.dumps(recipe_path) + ',\n    "output": {')
+        first = True
+        for repo_full, data in repo_items:
+            body = json.dumps(data, indent=4).replace("\n", "\n        ")
+            out.write(("\n" if first else ",\n") + "        " + json.dumps(repo_full) + ": " + body)
+            first = False
+        out.write("}\n}" if first else "\n    }\n}")
+    os.replace(tmp_path, output_path)
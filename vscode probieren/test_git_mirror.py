@@ -0,0 +1,92 @@
+"""
+Tests für das Scan-Backend "git" gegen lokale Bare-Repositories.
+
+Jeder Test legt unter tmp_path ein Remote "spx01/demo.git" mit release/*-Branches
+an (fester Pin, Untergrenze, fehlendes Recipe) und scannt es über
+scan_repositories(..., backend="git") mit eigenem Mirror-Verzeichnis.
+"""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import main
+from git_mirror import MirrorStore
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git nicht installiert")
+
+RECIPE_PATH = "conanrecipe_ckit.txt"
+REPO = "spx01/demo"
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+               GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com")
+
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, env=GIT_ENV, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def commit_branch(work, branch, recipe):
+    """Branch vom ersten Commit abzweigen, Recipe setzen bzw. entfernen und pushen"""
+    git(work, "checkout", "--quiet", "-B", branch, "base")
+    path = os.path.join(work, RECIPE_PATH)
+    if recipe is None:
+        if os.path.exists(path):
+            git(work, "rm", "--quiet", RECIPE_PATH)
+    else:
+        with open(path, "w") as f:
+            f.write(f"[requires]\n{recipe}\n")
+        git(work, "add", RECIPE_PATH)
+    git(work, "commit", "--quiet", "--allow-empty", "-m", branch)
+    git(work, "push", "--quiet", "--force", "origin", branch)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Bare-Remote mit drei release/*-Branches und einem Branch außerhalb des Musters"""
+    origin = tmp_path / "remotes" / "spx01" / "demo.git"
+    work = tmp_path / "work"
+    git(tmp_path, "init", "--quiet", "--bare", str(origin))
+    git(tmp_path, "init", "--quiet", str(work))
+    git(work, "remote", "add", "origin", str(origin))
+    git(work, "commit", "--quiet", "--allow-empty", "-m", "base")
+    git(work, "tag", "base")
+    commit_branch(work, "release/1.0", "constructionkit/1.42.0@spx00/release")
+    commit_branch(work, "release/2.0", "constructionkit/[>=1.43.0]@spx00/release")
+    commit_branch(work, "release/3.0", None)
+    commit_branch(work, "feature/x", "constructionkit/[>=1.0.0]@spx00/release")
+    return work
+
+
+@pytest.fixture
+def mirrors(tmp_path, monkeypatch):
+    store = MirrorStore(str(tmp_path / "mirrors"), str(tmp_path / "remotes" / "{repo}.git"))
+    monkeypatch.setattr(main, "MIRRORS", store)
+    return store
+
+
+def scan():
+    sink = main.scan_repositories([REPO], RECIPE_PATH, "release/*", concurrency=2, backend="git")
+    return sink.output()
+
+
+def test_scan_classifies_release_branches(remote, mirrors):
+    assert scan() == {REPO: {
+        "fixed_versions": [("release/1.0", "constructionkit/1.42.0@spx00/release")],
+        "latest_versions": [("release/2.0", "constructionkit/[>=1.43.0]@spx00/release")],
+        "unknown_versions": [("release/3.0", "")],
+    }}
+
+
+def test_rescan_fetches_moved_and_deleted_branches(remote, mirrors):
+    scan()
+    commit_branch(remote, "release/3.0", "constructionkit/[1.44.0]@spx00/release")
+    git(remote, "push", "--quiet", "origin", "--delete", "release/1.0")
+
+    assert scan() == {REPO: {
+        "fixed_versions": [("release/3.0", "constructionkit/[1.44.0]@spx00/release")],
+        "latest_versions": [("release/2.0", "constructionkit/[>=1.43.0]@spx00/release")],
+        "unknown_versions": [],
+    }}
@@ -0,0 +1,46 @@
+"""
+Tests für das Scan-Protokoll: Wiederaufnahme nach einem Absturz mitten in einer Zeile.
+"""
+from scan_log import ScanLog
+
+REPO = "spx01/demo"
+
+
+def test_resume_after_partial_line_keeps_next_record(tmp_path):
+    log = ScanLog(str(tmp_path / "scan_log.jsonl"))
+    log.start("r.txt", "release/*")
+    log.record(REPO, 0, "release/1.0", "fixed_versions", "constructionkit/1.0.0@spx00/release")
+    log.close()
+    # Absturz während des nächsten Eintrags
+    with open(log.path, "a") as f:
+        f.write('{"type": "branch", "repo": "spx01/demo", "ind')
+
+    assert log.resumable("r.txt", "release/*")
+    assert log.progress() == {REPO: {"release/1.0"}}
+    log.start("r.txt", "release/*", resume=True)
+    log.record(REPO, 1, "release/2.0", "latest_versions", "constructionkit/[>=1.0.0]@spx00/release")
+    log.repo_done(REPO, 2)
+    log.finish()
+
+    assert log.progress() == {REPO: True}
+    assert list(log.repo_results([REPO])) == [(REPO, {
+        "fixed_versions": [("release/1.0", "constructionkit/1.0.0@spx00/release")],
+        "latest_versions": [("release/2.0", "constructionkit/[>=1.0.0]@spx00/release")],
+        "unknown_versions": [],
+    })]
+
+
+def test_resume_without_partial_line_appends(tmp_path):
+    log = ScanLog(str(tmp_path / "scan_log.jsonl"))
+    log.start("r.txt", "release/*")
+    log.record(REPO, 0, "release/1.0", "unknown_versions", "")
+    log.close()
+    size = len(open(log.path).read())
+
+    log.start("r.txt", "release/*", resume=True)
+    log.repo_done(REPO, 1)
+    log.close()
+
+    with open(log.path) as f:
+        content = f.read()
+    assert len(content.splitlines()) == 3 and content[size:].startswith('{"type": "repo"')
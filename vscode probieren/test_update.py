@@ -0,0 +1,55 @@
+"""
+Tests für geplante Updates (Option C) gegen den lokalen GitHub-Mock.
+
+Ein Rollout legt PRs an, ein Rollout mit neuerer Version setzt sie weiter und
+benennt sie um; ein wiederholter Rollout derselben Version darf danach
+keinen einzigen Schreibzugriff mehr planen oder ausführen.
+"""
+import pytest
+
+import main
+from mock_github import Fleet, MockGitHub, RECIPE_PATH
+
+REPOS = ["spx01/repo-0000", "spx01/repo-0001"]
+
+
+@pytest.fixture
+def results():
+    """Mock mit gescannter Flotte -> (Mock, Ergebnisse im output.json-Format)"""
+    mock = MockGitHub(Fleet(len(REPOS), 6), latency=0, jitter=0).start()
+    main.setup_client({"api_url": mock.url, "http_cache": False})
+    main.CLIENT.set_token("tok")
+    output = main.scan_repositories(REPOS, RECIPE_PATH, "release/*", concurrency=4).output()
+    assert any(data["latest_versions"] for data in output.values())
+    yield mock, {"recipe_path": RECIPE_PATH, "output": output}
+    mock.stop()
+
+
+def rollout(results, version):
+    """Planen und ausführen -> (Aktionen je Branch, Report, Anzahl Schreibanfragen)"""
+    plan = main.plan_update(results, version, concurrency=4)
+    main.CLIENT.metrics.reset()
+    report = main.run_update(results, version, concurrency=4, plan=plan)
+    writes = sum(stats["calls"] for endpoint, stats in main.CLIENT.metrics.snapshot()["endpoints"].items()
+                 if not endpoint.startswith("GET "))
+    return {entry["action"] for entry in plan}, report, writes
+
+
+def test_repeated_rollout_plans_no_writes(results):
+    mock, data = results
+    branches = sum(len(info["latest_versions"]) for info in data["output"].values())
+
+    actions, report, writes = rollout(data, "1.90.0")
+    assert actions == {"create"} and report["created"] == branches and writes == 4 * branches
+
+    actions, report, writes = rollout(data, "1.91.0")
+    assert actions == {"update_pr"} and report["updated"] == branches and writes == 4 * branches
+    pulls = [pull for repo in REPOS for pull in mock.fleet.pulls[repo]]
+    assert {pull["title"] for pull in pulls} == {main.update_message("1.91.0")}
+    assert {pull["body"] for pull in pulls} == {main.update_body("1.91.0")}
+
+    plan = main.plan_update(data, "1.91.0", concurrency=4)
+    assert {entry["action"] for entry in plan} == {"skip"}
+    assert main.print_plan(plan) == 0
+    actions, report, writes = rollout(data, "1.91.0")
+    assert report["skipped"] == branches and writes == 0
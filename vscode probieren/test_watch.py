@@ -0,0 +1,116 @@
+"""
+Tests für den Watch-Modus gegen den lokalen GitHub-Mock.
+
+Aufgezeichnete push-/create-/delete-Payloads werden signiert an watch.serve()
+geschickt; geprüft werden das entprellte Modell, output.json, der
+Scan-Zustand und der laufende Datenbank-Lauf.
+"""
+import json
+import threading
+import time
+
+import pytest
+
+import main
+import watch
+from mock_github import Fleet, MockGitHub, RECIPE_PATH
+
+SECRET = "s3cret"
+REPOS = ["spx01/repo-0000", "spx01/repo-0001"]
+NEW_REFERENCE = "constructionkit/9.9.9@spx00/release"
+
+
+@pytest.fixture
+def github():
+    mock = MockGitHub(Fleet(len(REPOS), 5), latency=0, jitter=0).start()
+    yield mock
+    mock.stop()
+
+
+@pytest.fixture
+def watcher(github, tmp_path, monkeypatch):
+    """Gestarteter Watcher (Erstabgleich gelaufen) samt Empfänger -> (Watcher, URL)"""
+    monkeypatch.chdir(tmp_path)
+    config = {"repos": REPOS, "recipe_path": RECIPE_PATH, "branch_pattern": "release/*",
+              "api_url": github.url, "http_cache": False, "webhook_secret": SECRET,
+              "watch_debounce_seconds": 1.0, "watch_reconcile_minutes": 0}
+    main.setup_client(config)
+    main.CLIENT.set_token("tok")
+    w = watch.Watcher(config)
+    w.start()
+    server = watch.serve(w, "127.0.0.1", 0)
+    thread = threading.Thread(target=w.run, daemon=True)
+    thread.start()
+    yield w, "http://%s:%s/" % server.server_address[:2]
+    w.stop()
+    thread.join(5)
+    server.shutdown()
+    server.server_close()
+    w.store.close()
+
+
+def post(url, event, payload, secret=SECRET):
+    return watch.send_payload(url, event, json.dumps(payload).encode(), secret)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Zeitüberschreitung"
+        time.sleep(0.05)
+
+
+def test_events_update_model_and_output(watcher):
+    w, url = watcher
+    owner, repo = REPOS[0].split("/")
+    before = {repo_full: dict(branches) for repo_full, branches in w.model.items()}
+    assert "release/0002" in before[REPOS[0]]
+
+    # Recipe auf release/0001 ändern und wie GitHub melden
+    text, _ = main.get_file_content(owner, repo, RECIPE_PATH, "release/0001")
+    head = main.get_branch_sha(owner, repo, "release/0001")
+    content = main.update_version_in_content(text, "9.9.9")
+    head = main.commit_files(owner, repo, head, "release/0001", {RECIPE_PATH: content}, "bump", existing=True)
+    # Neuer Branch im zweiten Repo
+    base = main.get_branch_sha("spx01", "repo-0001", "release/0000")
+    main.check_response(main.CLIENT.post("/repos/spx01/repo-0001/git/refs",
+                                         json={"ref": "refs/heads/release/9999", "sha": base}), "Branch anlegen")
+
+    repository = {"full_name": REPOS[0]}
+    responses = [
+        post(url, "push", {"ref": "refs/heads/release/0001", "after": head, "repository": repository,
+                           "commits": [{"added": [], "removed": [], "modified": [RECIPE_PATH]}]}),
+        post(url, "push", {"ref": "refs/heads/release/0003", "after": "abc", "repository": repository,
+                           "commits": [{"added": ["README.md"], "removed": [], "modified": []}]}),
+        post(url, "create", {"ref": "release/9999", "ref_type": "branch", "repository": {"full_name": REPOS[1]}}),
+        post(url, "delete", {"ref": "release/0002", "ref_type": "branch", "repository": repository}),
+        post(url, "push", {"ref": "refs/heads/feature/0000", "after": "abc", "repository": repository}),
+        post(url, "push", {"ref": "refs/heads/release/0001", "repository": {"full_name": "other/x"}}),
+    ]
+    assert [(r.status_code, r.json()["accepted"]) for r in responses] == \
+        [(202, 1), (202, 1), (202, 1), (202, 1), (202, 0), (202, 0)]
+    assert post(url, "push", {"ref": "refs/heads/release/0001", "repository": repository},
+                secret="falsch").status_code == 401
+    assert post(url, "ping", {"zen": "hi"}).json() == {"message": "pong"}
+
+    wait_for(lambda: w.status()["flushes"] >= 1 and w.status()["pending"] == 0)
+    status = w.status()
+    assert (status["flushes"], status["fetched"], status["head_only"], status["deleted"]) == (1, 2, 1, 1)
+    assert (status["accepted"], status["ignored"], status["rejected"]) == (4, 2, 1)
+
+    # Entprelltes Modell: nur die gemeldeten Branches haben sich bewegt
+    expected = {repo_full: dict(branches) for repo_full, branches in before.items()}
+    expected[REPOS[0]]["release/0001"] = ("fixed_versions", NEW_REFERENCE)
+    del expected[REPOS[0]]["release/0002"]
+    expected[REPOS[1]]["release/9999"] = before[REPOS[1]]["release/0000"]
+    assert w.model == {repo_full: dict(sorted(branches.items())) for repo_full, branches in expected.items()}
+
+    with open("output.json") as f:
+        output = json.load(f)
+    assert output == {"recipe_path": RECIPE_PATH, "output": json.loads(json.dumps(
+        {repo_full: watch.output_data(w.model[repo_full]) for repo_full in REPOS}))}
+    assert w.store.output(w.live_run) == output
+
+    state = main.load_scan_state(main.DEFAULT_SCAN_STATE_DIR, REPOS[0], RECIPE_PATH)
+    assert state["release/0003"]["head"] == "abc"
+    assert "release/0002" not in state
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Watch-Modus: hält output.json und die Ergebnis-Datenbank per GitHub-Webhooks aktuell.
+
+Statt regelmäßig die ganze Flotte zu scannen, nimmt ein lokaler HTTP-Empfänger
+push-, create- und delete-Events entgegen. Events werden entprellt und danach
+nur die betroffenen (Repo, Branch)-Paare, die auf `branch_pattern` passen,
+neu abgerufen und klassifiziert. Pushes, die das Recipe nachweislich nicht
+berühren, aktualisieren nur den Head im Scan-Zustand. In größeren Abständen
+läuft ein gedrosselter Abgleich-Scan (inkrementell, daher meist nur
+Branch-Listen), der verpasste Events auffängt und einen neuen Lauf speichert.
+
+config.json (alle optional):
+    "webhook_host" / "webhook_port"   Adresse des Empfängers (127.0.0.1:8787)
+    "webhook_secret"                  Secret für X-Hub-Signature-256 (oder GITHUB_WEBHOOK_SECRET)
+    "watch_debounce_seconds"          Ruhezeit vor dem Abarbeiten gesammelter Events (5)
+    "watch_reconcile_minutes"         Abstand der Abgleich-Scans, 0 = aus (60)
+    "watch_reconcile_concurrency"     Parallelität der Abgleich-Scans (2)
+
+    python watch.py                                     # Empfänger starten
+    python watch.py send push.json --event push         # aufgezeichnete Payload einliefern
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+import main
+from main import Colors, locked_print
+from scan_log import BUCKET_KEYS, write_output
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+DEFAULT_DEBOUNCE_SECONDS = 5.0
+DEFAULT_RECONCILE_MINUTES = 60
+DEFAULT_RECONCILE_CONCURRENCY = 2
+
+# Längstens so viele Entprell-Intervalle wird bei Dauerfeuer gewartet
+MAX_DEBOUNCE_FACTOR = 6
+
+# GitHub liefert in push-Payloads höchstens 20 Commits; bei mehr ist die Dateiliste unvollständig
+PUSH_COMMIT_LIMIT = 20
+
+# Arten eines vorgemerkten Branches; eine spätere Art ersetzt die frühere,
+# nur "touched" stuft ein ausstehendes "changed" nicht herab
+CHANGED, TOUCHED, DELETED = "changed", "touched", "deleted"
+
+
+def signature_for(secret, body):
+    """X-Hub-Signature-256 einer Payload berechnen"""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, header):
+    """Signatur-Header prüfen (zeitkonstant)"""
+    return bool(header) and hmac.compare_digest(signature_for(secret, body), header)
+
+
+def touches_path(payload, path):
+    """Prüfen, ob ein Push die Datei `path` ändert -> True/False, None wenn unbekannt"""
+    commits = payload.get("commits")
+    if payload.get("created") or payload.get("forced") or not commits or len(commits) >= PUSH_COMMIT_LIMIT:
+        return None
+    path = path.lstrip("/")
+    for commit in commits:
+        if any(key not in commit for key in ("added", "removed", "modified")):
+            return None
+        if path in commit["added"] or path in commit["removed"] or path in commit["modified"]:
+            return True
+    return False
+
+
+def parse_event(event, payload, recipe_path):
+    """Webhook-Event auswerten -> [(repo, branch, Art, Head-SHA oder None)]; Tags und andere Events -> []"""
+    repo_full = (payload.get("repository") or {}).get("full_name")
+    if not repo_full:
+        return []
+    if event == "push":
+        ref = payload.get("ref", "")
+        if not ref.startswith("refs/heads/"):
+            return []
+        branch = ref[len("refs/heads/"):]
+        if payload.get("deleted"):
+            return [(repo_full, branch, DELETED, None)]
+        kind = TOUCHED if touches_path(payload, recipe_path) is False else CHANGED
+        return [(repo_full, branch, kind, payload.get("after"))]
+    if event in ("create", "delete") and payload.get("ref_type") == "branch":
+        return [(repo_full, payload["ref"], CHANGED if event == "create" else DELETED, None)]
+    return []
+
+
+def output_data(branches):
+    """{branch: (Kategorie, Version)} -> {Kategorie: [(branch, version)]} wie in output.json"""
+    data = {key: [] for key in BUCKET_KEYS}
+    for branch, (bucket, version) in branches.items():
+        data[bucket].append((branch, version))
+    return data
+
+
+class Watcher:
+    """Sammelt Events, arbeitet sie entprellt ab und gleicht regelmäßig voll ab"""
+
+    def __init__(self, config, output_path="output.json", debounce=None, reconcile_minutes=None):
+        self.config = config
+        self.output_path = output_path
+        self.recipe_path = config["recipe_path"]
+        self.branch_pattern = config["branch_pattern"]
+        self.backend = config.get("fetch_backend", "rest")
+        self.concurrency = int(config.get("concurrency", main.DEFAULT_CONCURRENCY))
+        self.state_dir = (config.get("scan_state_dir", main.DEFAULT_SCAN_STATE_DIR)
+                          if config.get("incremental", True) else None)
+        self.secret = os.environ.get("GITHUB_WEBHOOK_SECRET") or config.get("webhook_secret")
+        self.debounce = float(debounce if debounce is not None
+                              else config.get("watch_debounce_seconds", DEFAULT_DEBOUNCE_SECONDS))
+        minutes = float(reconcile_minutes if reconcile_minutes is not None
+                        else config.get("watch_reconcile_minutes", DEFAULT_RECONCILE_MINUTES))
+        self.reconcile_interval = 60 * minutes if minutes > 0 else None
+        self.reconcile_concurrency = int(config.get("watch_reconcile_concurrency", DEFAULT_RECONCILE_CONCURRENCY))
+
+        self.repos = []
+        self.model = {}       # repo_full -> {branch: (Kategorie, Version)} in Branch-Reihenfolge
+        self.store = main.open_results_store(config)
+        self.live_run = None  # Lauf in der Datenbank, der laufend fortgeschrieben wird
+
+        self.cond = threading.Condition()
+        self.pending = {}     # (repo, branch) -> (Art, Head-SHA)
+        self.first_event = self.last_event = 0.0
+        self.stopped = False
+        self.counters = {"events": 0, "accepted": 0, "ignored": 0, "rejected": 0, "flushes": 0,
+                         "fetched": 0, "head_only": 0, "deleted": 0, "reconciles": 0}
+        self.last_flush = self.last_reconcile = None
+
+    # --- Events ----------------------------------------------------------
+
+    def submit(self, items):
+        """Geparste Events vormerken -> Anzahl übernommener Branches"""
+        watched = set(self.repos)
+        accepted = 0
+        with self.cond:
+            self.counters["events"] += 1
+            for repo_full, branch, kind, head in items:
+                if repo_full not in watched or not fnmatch(branch, self.branch_pattern):
+                    continue
+                key = (repo_full, branch)
+                if kind == TOUCHED and self.pending.get(key, (None,))[0] == CHANGED:
+                    kind = CHANGED
+                if not self.pending:
+                    self.first_event = time.monotonic()
+                self.pending[key] = (kind, head)
+                self.last_event = time.monotonic()
+                accepted += 1
+            self.counters["accepted" if accepted else "ignored"] += 1
+            self.cond.notify()
+        return accepted
+
+    def reject(self):
+        with self.cond:
+            self.counters["rejected"] += 1
+
+    def status(self):
+        with self.cond:
+            return {**self.counters, "pending": len(self.pending), "repos": len(self.model),
+                    "branches": sum(len(b) for b in self.model.values()),
+                    "live_run": self.live_run, "last_flush": self.last_flush,
+                    "last_reconcile": self.last_reconcile}
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+
+    def _next_batch(self, next_reconcile):
+        """Warten, bis Events entprellt sind (-> Batch) oder ein Abgleich fällig ist (-> None)"""
+        with self.cond:
+            while not self.stopped:
+                now = time.monotonic()
+                due = float("inf")
+                if self.pending:
+                    due = min(self.last_event + self.debounce,
+                              self.first_event + MAX_DEBOUNCE_FACTOR * max(self.debounce, 0.1))
+                    if now >= due:
+                        batch, self.pending = self.pending, {}
+                        return batch
+                if now >= next_reconcile:
+                    return None
+                until = min(due, next_reconcile)
+                self.cond.wait(until - now if until != float("inf") else None)
+            return {}
+
+    # --- Ablauf ----------------------------------------------------------
+
+    def start(self):
+        """Letzte Ergebnisse übernehmen oder – ohne passende – sofort voll abgleichen"""
+        self.repos = main.resolve_repos(self.config)
+        if self.backend == "git":
+            main.setup_mirrors(self.config)
+        results = main.load_results(self.config)
+        if results and results.get("recipe_path") == self.recipe_path:
+            for repo_full in self.repos:
+                data = results["output"].get(repo_full)
+                if data is None:
+                    continue
+                branches = {branch: (bucket, version or "")
+                            for bucket in BUCKET_KEYS for branch, version in data.get(bucket, [])}
+                self.model[repo_full] = dict(sorted(branches.items()))
+            locked_print(f"{Colors.GRAY}📂 {sum(len(b) for b in self.model.values())} Branches aus "
+                         f"letzten Ergebnissen übernommen{Colors.RESET}")
+        else:
+            self.reconcile()
+
+    def run(self):
+        """Events abarbeiten, bis stop() aufgerufen wird"""
+        interval = self.reconcile_interval
+        next_reconcile = time.monotonic() + interval if interval else float("inf")
+        while not self.stopped:
+            batch = self._next_batch(next_reconcile)
+            try:
+                if batch is None:
+                    self.reconcile()
+                    next_reconcile = time.monotonic() + interval
+                elif batch:
+                    self.flush(batch)
+            except Exception as e:
+                locked_print(f"{Colors.RED}❌ Fehler im Watch-Modus: {e}{Colors.RESET}")
+
+    def flush(self, batch):
+        """Entprellte Branches abarbeiten: löschen, nur Head übernehmen oder neu abrufen"""
+        started = time.monotonic()
+        by_repo = {}
+        for (repo_full, branch), (kind, head) in batch.items():
+            by_repo.setdefault(repo_full, []).append((branch, kind, head))
+
+        pool = ThreadPoolExecutor(max_workers=max(1, self.concurrency))
+        try:
+            futures = {repo_full: pool.submit(self._refresh_repo, repo_full, items)
+                       for repo_full, items in by_repo.items()}
+            lines, changed = [], []
+            for repo_full, future in futures.items():
+                try:
+                    repo_lines, branches = future.result()
+                except Exception as e:
+                    lines.append(f"    {Colors.RED}❌ Fehler bei {repo_full}: {e}{Colors.RESET}")
+                    continue
+                lines.extend(repo_lines)
+                self.model[repo_full] = branches
+                changed.append(repo_full)
+        finally:
+            pool.shutdown()
+
+        self._write(changed)
+        with self.cond:
+            self.counters["flushes"] += 1
+            self.last_flush = time.strftime("%Y-%m-%dT%H:%M:%S")
+        locked_print(f"\n{Colors.BOLD}🔔 {len(batch)} Branches in {len(by_repo)} Repos aktualisiert "
+                     f"({time.monotonic() - started:.2f}s){Colors.RESET}", *lines)
+
+    def _refresh_repo(self, repo_full, items):
+        """Branches eines Repos aktualisieren -> (Ausgabezeilen, neues {branch: (Kategorie, Version)})"""
+        owner, repo = repo_full.split("/")
+        branches = dict(self.model.get(repo_full, {}))
+        state = main.load_scan_state(self.state_dir, repo_full, self.recipe_path) if self.state_dir else {}
+        lines, to_fetch = [], []
+
+        for branch, kind, head in items:
+            if kind == DELETED:
+                branches.pop(branch, None)
+                state.pop(branch, None)
+                lines.append(f"    {Colors.GRAY}🗑️  {repo_full} {branch}: gelöscht{Colors.RESET}")
+                self._count("deleted")
+            elif kind == TOUCHED and branch in branches and head:
+                # Recipe unverändert -> nur den Head merken, damit der Abgleich nicht neu abruft
+                if branch in state:
+                    state[branch]["head"] = head
+                self._count("head_only")
+            else:
+                to_fetch.append((branch, head))
+
+        if to_fetch:
+            heads = {}
+            for branch, head in to_fetch:
+                if head is None:
+                    try:
+                        head = main.get_branch_sha(owner, repo, branch)
+                    except main.GitHubAPIError as e:
+                        if e.status != 404:
+                            raise
+                        branches.pop(branch, None)
+                        state.pop(branch, None)
+                        continue
+                heads[branch] = head
+            names = list(heads)
+            if self.backend == "git":
+                main.MIRRORS.get(repo_full).sync()
+            size = {"graphql": main.GRAPHQL_CHUNK_SIZE, "git": len(names)}.get(self.backend, 1)
+            for start in range(0, len(names), max(1, size)):
+                group = names[start:start + max(1, size)]
+                for branch, (bucket, version, line, blob, content) in zip(
+                        group, main.scan_branches(owner, repo, self.recipe_path, group, self.backend)):
+                    branches[branch] = (bucket, version)
+                    state[branch] = {"head": heads[branch], "blob": blob, "bucket": bucket, "version": version}
+                    if bucket == "latest_versions":
+                        state[branch]["content"] = content
+                    lines.append(line.replace(f"{branch}:", f"{repo_full} {branch}:", 1))
+                    self._count("fetched")
+
+        if self.state_dir:
+            main.save_scan_state(self.state_dir, repo_full, self.recipe_path, state)
+        return lines, dict(sorted(branches.items()))
+
+    def _count(self, key):
+        with self.cond:
+            self.counters[key] += 1
+
+    def reconcile(self):
+        """Gedrosselter Voll-Abgleich (inkrementell) -> ersetzt das Modell und beginnt einen neuen Lauf"""
+        locked_print(f"\n{Colors.BOLD}🔁 Abgleich-Scan...{Colors.RESET}")
+        self.repos = main.resolve_repos(self.config)
+        if self.backend == "git":
+            main.setup_mirrors(self.config)
+        sink = main.scan_repositories(self.repos, self.recipe_path, self.branch_pattern,
+                                      self.reconcile_concurrency, self.backend, self.state_dir)
+        output = sink.output()
+        model = {}
+        for repo_full in self.repos:
+            if repo_full in output:
+                model[repo_full] = {branch: (bucket, version or "")
+                                    for bucket in BUCKET_KEYS for branch, version in output[repo_full][bucket]}
+                model[repo_full] = dict(sorted(model[repo_full].items()))
+            elif repo_full in self.model:
+                model[repo_full] = self.model[repo_full]  # fehlgeschlagen -> alten Stand behalten
+        self.model = model
+        self.live_run = None
+        self._write(list(model))
+        with self.cond:
+            self.counters["reconciles"] += 1
+            self.last_reconcile = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _write(self, changed):
+        """output.json neu schreiben und geänderte Repos in den laufenden Datenbank-Lauf übernehmen"""
+        items = [(repo_full, output_data(self.model[repo_full])) for repo_full in self.repos
+                 if repo_full in self.model]
+        write_output(self.output_path, self.recipe_path, items)
+        if not self.store:
+            return
+        if self.live_run is None:
+            self.live_run = self.store.import_run(self.recipe_path, self.branch_pattern, items)
+        else:
+            for repo_full in changed:
+                self.store.replace_repo(self.live_run, repo_full, output_data(self.model[repo_full]))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("", "/status"):
+            return self._reply(200, self.server.watcher.status())
+        self._reply(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        watcher = self.server.watcher
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if watcher.secret and not verify_signature(watcher.secret, body, self.headers.get("X-Hub-Signature-256")):
+            watcher.reject()
+            return self._reply(401, {"message": "Signatur ungültig"})
+        event = self.headers.get("X-GitHub-Event", "")
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                body = parse_qs(body.decode())["payload"][0].encode()
+            payload = json.loads(body)
+        except (KeyError, ValueError):
+            watcher.reject()
+            return self._reply(400, {"message": "Payload ist kein JSON"})
+        if event == "ping":
+            return self._reply(200, {"message": "pong"})
+        accepted = watcher.submit(parse_event(event, payload, watcher.recipe_path))
+        self._reply(202, {"accepted": accepted})
+
+
+def serve(watcher, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Webhook-Empfänger im Hintergrund starten -> Server (server_address enthält den echten Port)"""
+    server = _Server((host, port), _Handler)
+    server.watcher = watcher
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def send_payload(url, event, body, secret=None):
+    """Eine (aufgezeichnete) Payload wie GitHub einliefern -> Response"""
+    headers = {"Content-Type": "application/json", "X-GitHub-Event": event,
+               "X-GitHub-Delivery": str(uuid.uuid4())}
+    if secret:
+        headers["X-Hub-Signature-256"] = signature_for(secret, body)
+    return requests.post(url, data=body, headers=headers, timeout=30)
+
+
+def run_watch(config, host=None, port=None, debounce=None, reconcile_minutes=None):
+    """Watch-Modus im Vordergrund ausführen, bis Strg+C"""
+    main.setup_client(config)
+    watcher = Watcher(config, debounce=debounce, reconcile_minutes=reconcile_minutes)
+    watcher.start()
+    server = serve(watcher, host or config.get("webhook_host", DEFAULT_HOST),
+                   int(port if port is not None else config.get("webhook_port", DEFAULT_PORT)))
+    address = "%s:%s" % server.server_address[:2]
+    locked_print(f"{Colors.GREEN}👀 Warte auf Webhooks unter http://{address}/ "
+                 f"({len(watcher.repos)} Repos, Muster {watcher.branch_pattern}, "
+                 f"Signaturprüfung {'an' if watcher.secret else 'aus'}){Colors.RESET}")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        locked_print(f"\n{Colors.YELLOW}Watch-Modus beendet.{Colors.RESET}")
+    finally:
+        watcher.stop()
+        server.shutdown()
+        server.server_close()
+        if watcher.store:
+            watcher.store.close()
+
+
+def main_watch(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    run = sub.add_parser("run", help="Webhook-Empfänger starten (Standard)")
+    run.add_argument("--config", default="config.json")
+    run.add_argument("--host")
+    run.add_argument("--port", type=int)
+    run.add_argument("--debounce", type=float, help="Ruhezeit in s vor dem Abarbeiten")
+    run.add_argument("--reconcile-minutes", type=float, help="Abstand der Abgleich-Scans, 0 = aus")
+    send = sub.add_parser("send", help="aufgezeichnete Payload an einen laufenden Empfänger senden")
+    send.add_argument("payloads", nargs="+", help="JSON-Dateien mit Webhook-Payloads")
+    send.add_argument("--event", default="push", help="X-GitHub-Event (push, create, delete)")
+    send.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/")
+    send.add_argument("--secret", default=os.environ.get("GITHUB_WEBHOOK_SECRET"))
+    args = parser.parse_args(argv if argv is not None else (sys.argv[1:] or ["run"]))
+
+    if args.command == "send":
+        for path in args.payloads:
+            with open(path, "rb") as f:
+                r = send_payload(args.url, args.event, f.read(), args.secret)
+            print(f"{path}: {r.status_code} {r.text.strip()}")
+        return
+    config = main.load_config(args.config)
+    if not config:
+        sys.exit(f"{args.config} nicht gefunden – bitte erst im Menü (Option B) anlegen.")
+    run_watch(config, args.host, args.port, args.debounce, args.reconcile_minutes)
+
+
+if __name__ == "__main__":
+    main_watch()